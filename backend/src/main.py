@@ -2,65 +2,143 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))  # DON'T CHANGE THIS !!!
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, render_template, jsonify, request, redirect, url_for, session
 from flask_socketio import SocketIO
 from flask_login import LoginManager, current_user, login_user, logout_user, login_required
 import json
 
-app = Flask(__name__, 
-            static_folder='static',
-            template_folder='templates')
-
-app.config['SECRET_KEY'] = 'prysmsclips-secret-key'
-app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
-
-# Configuração do Socket.IO para minigames em tempo real
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Configuração do Login Manager
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'auth.login'
-
-# Importação de rotas
-from src.routes.auth import auth_bp
-from src.routes.clips import clips_bp
-from src.routes.ranking import ranking_bp
-from src.routes.loadout import loadout_bp
-from src.routes.bomb_game import bomb_game_bp
-
-# Registro de blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(clips_bp)
-app.register_blueprint(ranking_bp)
-app.register_blueprint(loadout_bp)
-app.register_blueprint(bomb_game_bp)
-
-@app.route('/')
-def index():
-    return jsonify({
-        "status": "success",
-        "message": "PRYSMSCLIPS API está funcionando!",
-        "endpoints": {
-            "auth": "/api/auth",
-            "clips": "/api/clips",
-            "ranking": "/api/ranking",
-            "loadout": "/api/loadout",
-            "bomb_game": "/api/bomb_game"
-        }
-    })
-
-# Importação de eventos Socket.IO
-from src.socket.loadout import register_loadout_events
-from src.socket.bomb_game import register_bomb_game_events
-
-# Registro de eventos Socket.IO
-register_loadout_events(socketio)
-register_bomb_game_events(socketio)
+def create_app():
+    # Toda a inicialização (rotas, persistência, threads de flush) fica aqui:
+    # processos do pool de mídia (spawn) reimportam este módulo como
+    # __mp_main__ e não devem repetir esses efeitos
+    app = Flask(__name__, 
+                static_folder='static',
+                template_folder='templates')
 
-if __name__ == '__main__':
-    # Certifique-se de que o diretório de uploads existe
+    # Serialização JSON rápida (orjson, se instalado) para todas as rotas
+    from src.services.json_provider import FastJSONProvider
+
+    app.json = FastJSONProvider(app)
+
+    app.config['SECRET_KEY'] = 'prysmsclips-secret-key'
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
+    # A pasta de uploads não é versionada: garante que ela exista
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    
-    # Inicie o servidor
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+
+    # Configuração do Socket.IO para minigames em tempo real
+    # Com várias instâncias, SOCKETIO_MESSAGE_QUEUE (redis://, amqp://, kafka://
+    # ou zmq://) distribui os broadcasts das salas entre os processos, e
+    # SOCKETIO_TRANSPORTS=websocket dispensa sessões fixas no balanceador
+    from src.services.pubsub import socketio_options
+
+    socketio = SocketIO(app, cors_allowed_origins="*", **socketio_options(
+        message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+        channel=os.environ.get('SOCKETIO_CHANNEL', 'prysmsclips'),
+        transports=os.environ.get('SOCKETIO_TRANSPORTS')
+    ))
+
+    # Configuração do Login Manager
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+
+    # Importação de rotas
+    from src.routes.auth import auth_bp, load_session_user
+    from src.routes.clips import clips_bp
+    from src.routes.ranking import ranking_bp
+    from src.routes.loadout import loadout_bp
+    from src.routes.bomb_game import bomb_game_bp
+
+    # Registro de blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(clips_bp)
+    app.register_blueprint(ranking_bp)
+    app.register_blueprint(loadout_bp)
+    app.register_blueprint(bomb_game_bp)
+
+    # Cache das respostas de leitura, invalidado pelas rotas de escrita; clipes
+    # e votos são invalidados onde são gravados (_add_clip e sinks dos contadores)
+    from src.services.response_cache import response_cache
+
+    response_cache.cache('clips.get_clips', ttl=5, tags=('clips',))
+    response_cache.cache('ranking.get_ranking', ttl=10, tags=('ranking',), per_user=True)
+    response_cache.cache('ranking.get_games', ttl=300, tags=('games',))
+    response_cache.cache('bomb_game.get_rooms', ttl=1, tags=('rooms',))
+    response_cache.cache('loadout.get_loadouts', ttl=5, tags=('loadouts',))
+    response_cache.cache('loadout.get_weapons', ttl=300, tags=('catalogue',))
+    response_cache.cache('loadout.get_skins', ttl=300, tags=('catalogue',))
+    response_cache.cache('loadout.get_stickers', ttl=300, tags=('catalogue',))
+    response_cache.invalidate_on('loadout.create_loadout', 'loadouts')
+    response_cache.invalidate_on('loadout.create_loadouts_bulk', 'loadouts')
+    response_cache.invalidate_on('ranking.follow_user', 'ranking')
+    response_cache.invalidate_on('ranking.unfollow_user', 'ranking')
+    response_cache.invalidate_on('bomb_game.create_room', 'rooms')
+    response_cache.invalidate_on('bomb_game.join_room', 'rooms')
+    response_cache.init_app(app)
+
+    # Compressão gzip/brotli das respostas; registrada depois do cache para rodar
+    # antes dele no after_request, que então guarda a versão comprimida
+    from src.services.compression import Compressor
+
+    Compressor(min_size=int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))).init_app(app)
+
+    @app.route('/api/cache/stats')
+    def cache_stats():
+        return jsonify({
+            "status": "success",
+            "cache": response_cache.stats()
+        })
+
+    # Resolve o usuário da sessão uma única vez por requisição (current_user)
+    @login_manager.request_loader
+    def load_user_from_request(flask_request):
+        user_id = session.get('user_id')
+        if not user_id:
+            return None
+        return load_session_user(user_id)
+
+    # Envio periódico em lote das curtidas, votos e visualizações acumulados em memória
+    # (snapshots iniciados antes, para o último snapshot incluir o flush final deles)
+    from src.routes.clips import clip_likes, view_ingestor
+    from src.routes.loadout import loadout_votes
+    from src.services.persistence import persistence
+
+    persistence.start()
+    clip_likes.start()
+    loadout_votes.start()
+    view_ingestor.start()
+
+    @app.route('/')
+    def index():
+        return jsonify({
+            "status": "success",
+            "message": "PRYSMSCLIPS API está funcionando!",
+            "endpoints": {
+                "auth": "/api/auth",
+                "clips": "/api/clips",
+                "ranking": "/api/ranking",
+                "loadout": "/api/loadout",
+                "bomb_game": "/api/bomb_game"
+            }
+        })
+
+    # Importação de eventos Socket.IO
+    from src.socket.loadout import register_loadout_events
+    from src.socket.bomb_game import register_bomb_game_events
+
+    # Registro de eventos Socket.IO
+    register_loadout_events(socketio)
+    register_bomb_game_events(socketio)
+
+    return app, socketio
+
+if __name__ != '__mp_main__':
+    app, socketio = create_app()
+
+if __name__ == '__main__':
+    from src.services.persistence import persistence
+
+    # Inicie o servidor (sem reloader com o WAL local: ele reexecuta o módulo
+    # num segundo processo, que não conseguiria travar o diretório)
+    socketio.run(app, host='0.0.0.0', port=5000, debug=True,
+                 use_reloader=not persistence.single_writer)
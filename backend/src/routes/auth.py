@@ -2,14 +2,47 @@ from flask import Blueprint, request, jsonify, session
 from flask_login import login_user, logout_user, login_required, current_user
 import json
 
+from src.routes.ranking import players_by_id
+from src.services.persistence import persistence
+from src.services.ttl_cache import TTLCache
+from src.services.user_store import SessionUser, UserStore
+
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 # Simulação de banco de dados de usuários para prototipação
-users_db = {
-    "user1": {"username": "ProGamer123", "password": "senha123", "prysms": 1500},
-    "user2": {"username": "GameMaster", "password": "senha123", "prysms": 1200},
-    "user3": {"username": "NinjaStreamer", "password": "senha123", "prysms": 900},
-}
+# (senha de todos os usuários de teste: senha123)
+users_db = UserStore(persistence.load('users', {
+    "user1": {
+        "username": "ProGamer123",
+        "password_hash": "pbkdf2:sha256:600000$7nx6vrmKRRsxsArD$8fc41043ecbb80ba4fa5dee87d537cedb035b5f9035a385467764b6531ec5ca6",
+        "prysms": 1500
+    },
+    "user2": {
+        "username": "GameMaster",
+        "password_hash": "pbkdf2:sha256:600000$wrWziLX1gWfeUaDq$9e22cca5b1845fee1879736daa2c5745336113c8359106247bf10b132945a485",
+        "prysms": 1200
+    },
+    "user3": {
+        "username": "NinjaStreamer",
+        "password_hash": "pbkdf2:sha256:600000$u6QrWp94iAqPBn0U$3e9bef7100fae9e62b4c5591c4885f47822d61b77fbbc92f1d2cb2059fd40797",
+        "prysms": 900
+    },
+}))
+# Jogadores do ranking usam os mesmos ids: novos cadastros começam depois deles
+users_db.reserve_ids(players_by_id)
+
+# Cache dos usuários carregados pelo LoginManager a cada requisição
+session_users = TTLCache(max_size=4096, ttl=60)
+
+def load_session_user(user_id):
+    user = session_users.get(user_id)
+    if user is None:
+        user_data = users_db.get(user_id)
+        if user_data is None:
+            return None
+        user = SessionUser(user_id, user_data)
+        session_users.set(user_id, user)
+    return user
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -17,20 +50,23 @@ def login():
     username = data.get('username')
     password = data.get('password')
     
-    # Verificação simples para prototipação
-    for user_id, user_data in users_db.items():
-        if user_data['username'] == username and user_data['password'] == password:
-            # Simulação de login bem-sucedido
-            session['user_id'] = user_id
-            return jsonify({
-                "status": "success",
-                "message": "Login realizado com sucesso",
-                "user": {
-                    "id": user_id,
-                    "username": user_data['username'],
-                    "prysms": user_data['prysms']
-                }
-            })
+    user_id = None
+    if username and password:
+        user_id = users_db.authenticate(username, password)
+    
+    if user_id:
+        user_data = users_db[user_id]
+        session['user_id'] = user_id
+        session_users.invalidate(user_id)
+        return jsonify({
+            "status": "success",
+            "message": "Login realizado com sucesso",
+            "user": {
+                "id": user_id,
+                "username": user_data['username'],
+                "prysms": user_data['prysms']
+            }
+        })
     
     return jsonify({
         "status": "error",
@@ -39,7 +75,9 @@ def login():
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
-    session.pop('user_id', None)
+    user_id = session.pop('user_id', None)
+    if user_id:
+        session_users.invalidate(user_id)
     return jsonify({
         "status": "success",
         "message": "Logout realizado com sucesso"
@@ -51,21 +89,27 @@ def register():
     username = data.get('username')
     password = data.get('password')
     
+    if not username or not password:
+        return jsonify({
+            "status": "error",
+            "message": "Nome de usuário e senha são obrigatórios"
+        }), 400
+    
     # Verificar se o usuário já existe
-    for user_data in users_db.values():
-        if user_data['username'] == username:
-            return jsonify({
-                "status": "error",
-                "message": "Nome de usuário já existe"
-            }), 400
+    if users_db.id_for_username(username):
+        return jsonify({
+            "status": "error",
+            "message": "Nome de usuário já existe"
+        }), 400
     
-    # Criar novo usuário
-    new_user_id = f"user{len(users_db) + 1}"
-    users_db[new_user_id] = {
-        "username": username,
-        "password": password,
-        "prysms": 100  # Prysms iniciais para novos usuários
-    }
+    # Criar novo usuário (100 Prysms iniciais para novos usuários)
+    new_user_id = users_db.create(username, password, prysms=100)
+    if not new_user_id:
+        return jsonify({
+            "status": "error",
+            "message": "Nome de usuário já existe"
+        }), 400
+    persistence.put('users', new_user_id, users_db[new_user_id])
     
     return jsonify({
         "status": "success",
@@ -77,21 +121,27 @@ def register():
         }
     }), 201
 
+@auth_bp.route('/stats', methods=['GET'])
+def stats():
+    # Custo de hashing e acertos do cache de credenciais (picos de login)
+    return jsonify({
+        "status": "success",
+        "users": users_db.stats()
+    })
+
 @auth_bp.route('/profile', methods=['GET'])
 def profile():
-    user_id = session.get('user_id')
-    if not user_id or user_id not in users_db:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
     
-    user_data = users_db[user_id]
     return jsonify({
         "status": "success",
         "user": {
-            "id": user_id,
-            "username": user_data['username'],
-            "prysms": user_data['prysms']
+            "id": current_user.id,
+            "username": current_user.username,
+            "prysms": current_user.prysms
         }
     })
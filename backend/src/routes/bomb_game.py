@@ -1,11 +1,16 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
 import json
 import random
 
+from src.services.persistence import persistence
+from src.services.room_registry import RoomRegistry
+
 bomb_game_bp = Blueprint('bomb_game', __name__, url_prefix='/api/bomb_game')
+MAX_ROOM_PLAYERS = 64
 
 # Simulação de banco de dados de salas de jogo
-rooms_db = [
+rooms_db = RoomRegistry(persistence.load_list('rooms', [
     {
         "id": "room1",
         "name": "Sala #1",
@@ -30,7 +35,13 @@ rooms_db = [
         "max_players": 16,
         "status": "Em andamento"
     }
-]
+]))
+
+def _persist_room(room):
+    # A ocupação depende das conexões ativas e não é persistida
+    persistence.put('rooms', room['id'], dict(room, players=0))
+
+rooms_db.subscribe(_persist_room)
 
 # Simulação de banco de dados de sequências para o jogo
 sequences_db = [
@@ -43,35 +54,37 @@ sequences_db = [
 
 @bomb_game_bp.route('/rooms', methods=['GET'])
 def get_rooms():
+    category = request.args.get('category', None)
+    status = request.args.get('status', None)
+    open_only = request.args.get('open', 'false').lower() in ('1', 'true')
+    
     return jsonify({
         "status": "success",
-        "rooms": rooms_db
+        "rooms": rooms_db.filter(category=category, status=status, open_only=open_only)
     })
 
 @bomb_game_bp.route('/rooms', methods=['POST'])
 def create_room():
-    user_id = session.get('user_id')
-    if not user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    user_id = current_user.id
     
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     name = data.get('name', f"Sala #{len(rooms_db) + 1}")
     category = data.get('category', "Geral")
     max_players = data.get('max_players', 16)
+    if isinstance(max_players, bool) or not isinstance(max_players, int) \
+            or not 1 <= max_players <= MAX_ROOM_PLAYERS:
+        return jsonify({
+            "status": "error",
+            "message": f"max_players deve ser um inteiro entre 1 e {MAX_ROOM_PLAYERS}"
+        }), 400
     
-    new_room = {
-        "id": f"room{len(rooms_db) + 1}",
-        "name": name,
-        "category": category,
-        "players": 1,  # Inicialmente apenas o criador
-        "max_players": max_players,
-        "status": "Aguardando"
-    }
-    
-    rooms_db.append(new_room)
+    # O criador já ocupa uma vaga
+    new_room = rooms_db.create(name, category, max_players, user_id)
     
     return jsonify({
         "status": "success",
@@ -81,27 +94,27 @@ def create_room():
 
 @bomb_game_bp.route('/rooms/<room_id>/join', methods=['POST'])
 def join_room(room_id):
-    user_id = session.get('user_id')
-    if not user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    user_id = current_user.id
     
-    for room in rooms_db:
-        if room['id'] == room_id:
-            if room['players'] >= room['max_players']:
-                return jsonify({
-                    "status": "error",
-                    "message": "Sala cheia"
-                }), 400
-            
-            room['players'] += 1
-            return jsonify({
-                "status": "success",
-                "message": "Entrou na sala com sucesso",
-                "room": room
-            })
+    # Reserva a vaga; ela é confirmada quando o socket entra na sala
+    room, error = rooms_db.reserve(room_id, user_id)
+    if error == 'full':
+        return jsonify({
+            "status": "error",
+            "message": "Sala cheia"
+        }), 400
+    
+    if room:
+        return jsonify({
+            "status": "success",
+            "message": "Entrou na sala com sucesso",
+            "room": room
+        })
     
     return jsonify({
         "status": "error",
@@ -118,30 +131,3 @@ def get_sequence():
         "sequence": sequence,
         "time_limit": 60  # Tempo limite em segundos
     })
-
-@bomb_game_bp.route('/verify', methods=['POST'])
-def verify_sequence():
-    data = request.get_json()
-    input_sequence = data.get('sequence', '')
-    expected_sequence = data.get('expected_sequence', '')
-    time_taken = data.get('time_taken', 0)
-    
-    if input_sequence == expected_sequence:
-        # Calcular recompensa com base no tempo
-        reward = max(10, 100 - int(time_taken))
-        
-        return jsonify({
-            "status": "success",
-            "message": "Bomba desarmada com sucesso!",
-            "success": True,
-            "reward": reward,
-            "time_taken": time_taken
-        })
-    else:
-        return jsonify({
-            "status": "success",
-            "message": "Falha ao desarmar a bomba!",
-            "success": False,
-            "reward": 0,
-            "time_taken": time_taken
-        })
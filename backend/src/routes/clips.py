@@ -1,10 +1,52 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
+from werkzeug.utils import safe_join
+from flask_login import current_user
+from datetime import datetime, timezone
+import hashlib
 import json
+import os
+
+from src.services.clip_store import ClipRepository, SORT_ORDERS
+from src.services.counters import CounterEngine
+from src.services.media import MediaPipeline
+from src.services.media_files import send_media
+from src.services.persistence import persistence
+from src.services.response_cache import response_cache
+from src.services.thumbnails import FORMATS, THUMBNAIL_SIZES, ThumbnailCache
+from src.services.search_index import SearchIndex
+from src.services.trending import TrendingIndex
+from src.services.view_ingestion import ViewIngestor
+from src.services.uploads import CHUNK_SIZE, UploadManager, UploadOffsetError
+from src.routes.ranking import index_player_game, record_clip
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Uploads em partes e processamento de vídeo em segundo plano
+uploads = UploadManager()
+media_pipeline = MediaPipeline(
+    max_workers=int(os.environ.get('CLIP_PROCESSING_WORKERS', 2)),
+    max_in_flight=int(os.environ.get('CLIP_PROCESSING_QUEUE', 8))
+)
+
+# Cache de thumbnails redimensionadas, criado no primeiro uso
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get('THUMBNAIL_CACHE_MAX_MB', 256)) * 1024 * 1024
+_thumbnail_cache = None
+
+def thumbnail_cache():
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        directory = current_app.config.get(
+            'THUMBNAIL_CACHE_FOLDER',
+            os.path.join(current_app.config['UPLOAD_FOLDER'], '.thumbs')
+        )
+        _thumbnail_cache = ThumbnailCache(directory, THUMBNAIL_CACHE_MAX_BYTES)
+    return _thumbnail_cache
 
 clips_bp = Blueprint('clips', __name__, url_prefix='/api/clips')
 
 # Simulação de banco de dados de clipes para prototipação
-clips_db = [
+clips_db = ClipRepository(persistence.load_list('clips', [
     {
         "id": "clip1",
         "title": "Vitória épica no último segundo!",
@@ -47,73 +89,271 @@ clips_db = [
         "thumbnail": "/static/uploads/thumb3.jpg",
         "created_at": "2025-05-22T18:45:00Z"
     }
-]
+]))
+
+def _persist_clip(clip):
+    persistence.put('clips', clip['id'], clip, wait=False)
+
+# Toda alteração de clipe vai para o WAL; quem responde ao cliente aguarda o fsync
+clips_db.subscribe(_persist_clip)
+
+def _apply_like_deltas(deltas):
+    for clip_id, delta in deltas.items():
+        clips_db.increment(clip_id, 'likes', delta)
+    persistence.sync()
+    response_cache.invalidate('clips')
+
+for _clip in clips_db:
+    index_player_game(_clip['user_id'], _clip['game'])
+
+# Ranking de clipes em alta, atualizado a cada curtida/visualização/novo clipe
+trending = TrendingIndex(clips_db)
+
+# Busca textual por título, jogo e usuário, atualizada a cada novo clipe
+search_index = SearchIndex(clips_db)
+
+# Sem esperar o fsync: o sync() de _apply_like_deltas grava o par junto com o delta
+def _persist_like(clip_id, user_id):
+    persistence.put('likes', f"{clip_id}:{user_id}", {"clip_id": clip_id, "user_id": user_id},
+                    wait=False)
+
+# Curtidas agregadas em memória e aplicadas em lote no clips_db; quem já
+# curtiu cada clipe sobrevive a reinícios
+clip_likes = CounterEngine(_apply_like_deltas, on_counted=_persist_like)
+for _like in persistence.load('likes', {}).values():
+    clip_likes.seed(_like['clip_id'], [_like['user_id']])
+
+def _apply_view_deltas(deltas):
+    for clip_id, delta in deltas.items():
+        clips_db.increment(clip_id, 'views', delta)
+    persistence.sync()
+    response_cache.invalidate('clips')
+
+# Visualizações únicas (HyperLogLog) incorporadas periodicamente ao clips_db
+view_ingestor = ViewIngestor(_apply_view_deltas)
+MAX_VIEW_BEACONS = 1000
 
 @clips_bp.route('/', methods=['GET'])
 def get_clips():
     category = request.args.get('category', None)
     game = request.args.get('game', None)
+    limit = request.args.get('limit', None)
+    cursor = request.args.get('cursor', None)
+    sort = request.args.get('sort', None)
+    
+    # Sem parâmetros de paginação mantém a resposta completa de antes
+    if limit is None and cursor is None and sort is None:
+        if persistence.sql:
+            filtered_clips = persistence.clips(category=category, game=game)
+        else:
+            filtered_clips = clips_db.filter(category=category, game=game)
+        
+        return jsonify({
+            "status": "success",
+            "clips": filtered_clips
+        })
+    
+    sort = sort or 'newest'
+    if sort not in SORT_ORDERS:
+        return jsonify({
+            "status": "error",
+            "message": "Ordenação inválida"
+        }), 400
+    
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Limite inválido"
+        }), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    try:
+        # No modo SQL a página sai do banco (índices de cobertura)
+        source = persistence.clip_page if persistence.sql else clips_db.page
+        page, next_cursor = source(sort, limit, cursor, category=category, game=game)
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Cursor inválido"
+        }), 400
     
-    filtered_clips = clips_db
+    return jsonify({
+        "status": "success",
+        "clips": page,
+        "sort": sort,
+        "next_cursor": next_cursor
+    })
+
+@clips_bp.route('/search', methods=['GET'])
+def search_clips():
+    query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
     
-    if category:
-        filtered_clips = [clip for clip in filtered_clips if clip['category'] == category]
+    if not query:
+        return jsonify({
+            "status": "error",
+            "message": "Informe o termo de busca"
+        }), 400
     
-    if game:
-        filtered_clips = [clip for clip in filtered_clips if clip['game'] == game]
+    return jsonify({
+        "status": "success",
+        "query": query,
+        "clips": search_index.search(query, limit=limit)
+    })
+
+@clips_bp.route('/trending', methods=['GET'])
+def get_trending_clips():
+    game = request.args.get('game', None)
+    category = request.args.get('category', None)
+    limit = request.args.get('limit', None, type=int)
     
     return jsonify({
         "status": "success",
-        "clips": filtered_clips
+        "clips": trending.top(game=game, category=category, limit=limit)
     })
 
 @clips_bp.route('/<clip_id>', methods=['GET'])
 def get_clip(clip_id):
-    for clip in clips_db:
-        if clip['id'] == clip_id:
-            return jsonify({
-                "status": "success",
-                "clip": clip
-            })
+    clip = clips_db.get(clip_id)
+    if clip:
+        return jsonify({
+            "status": "success",
+            "clip": dict(clip, likes=clip_likes.value(clip_id, clip['likes']),
+                         views=clip['views'] + view_ingestor.pending(clip_id))
+        })
     
     return jsonify({
         "status": "error",
         "message": "Clipe não encontrado"
     }), 404
 
-@clips_bp.route('/', methods=['POST'])
-def create_clip():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({
-            "status": "error",
-            "message": "Usuário não autenticado"
-        }), 401
-    
-    data = request.get_json()
-    title = data.get('title')
-    game = data.get('game')
-    category = data.get('category')
-    
-    # Em uma implementação real, aqui seria feito o upload do arquivo
-    # e processamento do vídeo/thumbnail
-    
+def _add_clip(user_id, username, title, game, category, url, thumbnail, clip_id=None, **extra):
     new_clip = {
-        "id": f"clip{len(clips_db) + 1}",
+        "id": clip_id or clips_db.allocate_id(),
         "title": title,
         "user_id": user_id,
-        "username": "Username do Usuário",  # Em uma implementação real, seria obtido do banco de dados
+        "username": username,
         "game": game,
         "views": 0,
         "likes": 0,
         "comments": 0,
         "category": category,
-        "url": "/static/uploads/placeholder.mp4",
-        "thumbnail": "/static/uploads/placeholder.jpg",
-        "created_at": "2025-05-25T00:00:00Z"  # Em uma implementação real, seria a data atual
+        "url": url,
+        "thumbnail": thumbnail,
+        "created_at": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
     }
+    new_clip.update(extra)
+    
+    clips_db.add(new_clip)
+    record_clip(user_id, game)
+    persistence.sync()
+    response_cache.invalidate('clips', 'ranking')
+    return new_clip
+
+@clips_bp.route('/views', methods=['POST'])
+def ingest_views():
+    data = request.get_json(silent=True) or {}
+    beacons = data.get('views')
+    if not isinstance(beacons, list) or len(beacons) > MAX_VIEW_BEACONS:
+        return jsonify({
+            "status": "error",
+            "message": f"Envie até {MAX_VIEW_BEACONS} visualizações por lote"
+        }), 400
     
-    clips_db.append(new_clip)
+    # Usuário logado identifica o espectador; anônimos são identificados pelo
+    # servidor (IP + User-Agent, fixado no cookie de sessão assinado), nunca
+    # pelo viewer_id enviado pelo cliente
+    if current_user.is_authenticated:
+        viewer_id = current_user.id
+    else:
+        viewer_id = session.setdefault('viewer_id', hashlib.sha256(
+            f"{request.remote_addr}|{request.user_agent.string}".encode('utf-8')
+        ).hexdigest()[:32])
+    
+    accepted = 0
+    for beacon in beacons:
+        clip_id = beacon.get('clip_id') if isinstance(beacon, dict) else None
+        if clip_id not in clips_db:
+            continue
+        view_ingestor.ingest(clip_id, viewer_id)
+        accepted += 1
+    
+    return jsonify({
+        "status": "success",
+        "accepted": accepted,
+        "rejected": len(beacons) - accepted
+    }), 202
+
+@clips_bp.route('/<clip_id>/media', methods=['GET'])
+def get_clip_media(clip_id):
+    clip = clips_db.get(clip_id)
+    path = None
+    if clip and clip['url'].startswith('/static/uploads/'):
+        path = safe_join(current_app.config['UPLOAD_FOLDER'], clip['url'].rsplit('/', 1)[-1])
+    
+    if not path or not os.path.isfile(path):
+        return jsonify({
+            "status": "error",
+            "message": "Vídeo não encontrado"
+        }), 404
+    
+    # Suporta Range/206 para permitir avançar no vídeo sem baixar tudo
+    return send_media(request, path)
+
+@clips_bp.route('/<clip_id>/thumbnail', methods=['GET'])
+def get_clip_thumbnail(clip_id):
+    size = request.args.get('size', 'feed')
+    image_format = request.args.get('format', None)
+    if image_format is None:
+        # WebP só quando o cliente o declara explicitamente no Accept
+        accepts_webp = any(mimetype == 'image/webp' and quality > 0
+                           for mimetype, quality in request.accept_mimetypes)
+        image_format = 'webp' if accepts_webp else 'jpeg'
+    
+    if size not in THUMBNAIL_SIZES or image_format not in FORMATS:
+        return jsonify({
+            "status": "error",
+            "message": "Tamanho ou formato inválido"
+        }), 400
+    
+    clip = clips_db.get(clip_id)
+    path = None
+    if clip and clip['thumbnail'].startswith('/static/uploads/'):
+        path = safe_join(current_app.config['UPLOAD_FOLDER'], clip['thumbnail'].rsplit('/', 1)[-1])
+    
+    if not path or not os.path.isfile(path):
+        return jsonify({
+            "status": "error",
+            "message": "Thumbnail não encontrada"
+        }), 404
+    
+    cache = thumbnail_cache()
+    try:
+        response = send_media(request, cache.get(path, size, image_format))
+    except FileNotFoundError:
+        # Derivado removido pelo LRU entre o get e o envio: renderiza de novo
+        response = send_media(request, cache.get(path, size, image_format))
+    response.vary.add('Accept')
+    return response
+
+@clips_bp.route('/', methods=['POST'])
+def create_clip():
+    if not current_user.is_authenticated:
+        return jsonify({
+            "status": "error",
+            "message": "Usuário não autenticado"
+        }), 401
+    user_id = current_user.id
+    
+    data = request.get_json()
+    
+    new_clip = _add_clip(
+        user_id, current_user.username, data.get('title'), data.get('game'), data.get('category'),
+        url="/static/uploads/placeholder.mp4",
+        thumbnail="/static/uploads/placeholder.jpg"
+    )
     
     return jsonify({
         "status": "success",
@@ -123,23 +363,148 @@ def create_clip():
 
 @clips_bp.route('/<clip_id>/like', methods=['POST'])
 def like_clip(clip_id):
-    user_id = session.get('user_id')
-    if not user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    user_id = current_user.id
     
-    for clip in clips_db:
-        if clip['id'] == clip_id:
-            clip['likes'] += 1
+    clip = clips_db.get(clip_id)
+    if clip:
+        if not clip_likes.increment(clip_id, user_id):
             return jsonify({
                 "status": "success",
-                "message": "Clipe curtido com sucesso",
-                "likes": clip['likes']
+                "message": "Você já curtiu este clipe",
+                "likes": clip_likes.value(clip_id, clip['likes'])
             })
+        
+        return jsonify({
+            "status": "success",
+            "message": "Clipe curtido com sucesso",
+            "likes": clip_likes.value(clip_id, clip['likes'])
+        })
     
     return jsonify({
         "status": "error",
         "message": "Clipe não encontrado"
     }), 404
+
+def _upload_state(upload):
+    return {
+        "upload_id": upload.id,
+        "offset": upload.received,
+        "size": upload.total_size,
+        "chunk_size": CHUNK_SIZE
+    }
+
+def _media_done(clip_id, thumbnail_url):
+    def on_done(metadata, error):
+        # Aplicado pelo repositório, que notifica índices e persistência
+        if error is not None:
+            clips_db.update(clip_id, status="failed")
+        else:
+            clips_db.update(clip_id, thumbnail=thumbnail_url, status="ready", **metadata)
+        persistence.sync()
+        response_cache.invalidate('clips')
+    return on_done
+
+@clips_bp.route('/uploads', methods=['POST'])
+def start_upload():
+    if not current_user.is_authenticated:
+        return jsonify({
+            "status": "error",
+            "message": "Usuário não autenticado"
+        }), 401
+    
+    data = request.get_json(silent=True) or {}
+    metadata = {
+        "title": data.get('title'),
+        "game": data.get('game'),
+        "category": data.get('category')
+    }
+    
+    try:
+        upload = uploads.start(current_user.id, metadata, data.get('size'),
+                               data.get('filename'), current_app.config['UPLOAD_FOLDER'])
+    except ValueError as error:
+        return jsonify({
+            "status": "error",
+            "message": str(error)
+        }), 400
+    
+    return jsonify(dict(_upload_state(upload), status="success")), 201
+
+@clips_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    if not current_user.is_authenticated:
+        return jsonify({
+            "status": "error",
+            "message": "Usuário não autenticado"
+        }), 401
+    
+    # Permite retomar o envio a partir do último byte recebido
+    upload = uploads.get(upload_id, current_user.id)
+    if upload is None:
+        return jsonify({
+            "status": "error",
+            "message": "Upload não encontrado"
+        }), 404
+    
+    return jsonify(dict(_upload_state(upload), status="success"))
+
+@clips_bp.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    if not current_user.is_authenticated:
+        return jsonify({
+            "status": "error",
+            "message": "Usuário não autenticado"
+        }), 401
+    
+    upload = uploads.get(upload_id, current_user.id)
+    if upload is None:
+        return jsonify({
+            "status": "error",
+            "message": "Upload não encontrado"
+        }), 404
+    
+    offset = request.headers.get('Upload-Offset', type=int)
+    try:
+        # O corpo é lido em blocos direto para o disco
+        uploads.write(upload, offset, request.stream, request.content_length)
+    except UploadOffsetError as error:
+        return jsonify(dict(_upload_state(upload), status="error", message=str(error))), 409
+    except ValueError as error:
+        return jsonify({
+            "status": "error",
+            "message": str(error)
+        }), 400
+    
+    if not upload.complete:
+        return jsonify(dict(_upload_state(upload), status="success"))
+    
+    # Envio completo: cria o clipe e agenda thumbnail/metadados
+    folder = current_app.config['UPLOAD_FOLDER']
+    clip_id = clips_db.allocate_id()
+    video_name = f"{clip_id}.{upload.extension}"
+    thumbnail_name = f"thumb_{clip_id}.jpg"
+    uploads.finish(upload, os.path.join(folder, video_name))
+    
+    new_clip = _add_clip(
+        current_user.id, current_user.username, upload.metadata['title'],
+        upload.metadata['game'], upload.metadata['category'],
+        url=f"/static/uploads/{video_name}",
+        thumbnail="/static/uploads/placeholder.jpg",
+        clip_id=clip_id,
+        status="processing"
+    )
+    media_pipeline.submit(
+        os.path.join(folder, video_name), os.path.join(folder, thumbnail_name),
+        _media_done(new_clip['id'], f"/static/uploads/{thumbnail_name}")
+    )
+    
+    return jsonify({
+        "status": "success",
+        "message": "Clipe enviado, processamento em andamento",
+        "clip": new_clip
+    }), 201
@@ -1,5 +1,14 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
 import json
+import os
+
+from src.services.catalogue import Catalogue
+from src.services.counters import CounterEngine
+from src.services.loadout_validation import LoadoutValidator
+from src.services.persistence import persistence
+from src.services.response_cache import response_cache
+from src.services.vote_aggregator import VoteAggregator
 
 loadout_bp = Blueprint('loadout', __name__, url_prefix='/api/loadout')
 
@@ -85,8 +94,18 @@ stickers_db = [
     }
 ]
 
+# Catálogos pré-serializados; ao alterar as listas acima chamar invalidate()
+# nos catálogos e refresh() no validador
+weapons_catalogue = Catalogue('weapons', weapons_db)
+skins_catalogue = Catalogue('skins', skins_db, group_by='weapon_id')
+stickers_catalogue = Catalogue('stickers', stickers_db)
+loadout_validator = LoadoutValidator(weapons_db, skins_db, stickers_db)
+
+# Limite de itens por importação em lote
+MAX_BULK_LOADOUTS = 5000
+
 # Simulação de banco de dados de loadouts criados pelos usuários
-loadouts_db = [
+loadouts_db = persistence.load_list('loadouts', [
     {
         "id": "loadout1",
         "user_id": "user1",
@@ -98,82 +117,97 @@ loadouts_db = [
         "votes": 120,
         "created_at": "2025-05-20T14:30:00Z"
     }
-]
+])
+
+loadouts_by_id = {loadout['id']: loadout for loadout in loadouts_db}
+
+def _apply_vote_deltas(deltas):
+    for loadout_id, delta in deltas.items():
+        loadout = loadouts_by_id.get(loadout_id)
+        if loadout:
+            loadout['votes'] += delta
+            persistence.put('loadouts', loadout_id, loadout, wait=False)
+    persistence.sync()
+    response_cache.invalidate('loadouts')
+
+def _stored_votes(loadout_id):
+    loadout = loadouts_by_id.get(loadout_id)
+    return loadout['votes'] if loadout else None
+
+# Sem esperar o fsync: o sync() de _apply_vote_deltas grava o par junto com o delta
+def _persist_vote(loadout_id, user_id):
+    persistence.put('votes', f"{loadout_id}:{user_id}", {"loadout_id": loadout_id, "user_id": user_id},
+                    wait=False)
+
+# Votos agregados em memória e aplicados em lote no loadouts_db; quem já
+# votou em cada loadout sobrevive a reinícios
+loadout_votes = CounterEngine(_apply_vote_deltas, on_counted=_persist_vote)
+for _vote in persistence.load('votes', {}).values():
+    loadout_votes.seed(_vote['loadout_id'], [_vote['user_id']])
+
+# Contagens compartilhadas entre REST e Socket.IO, enviadas às salas com debounce
+vote_aggregator = VoteAggregator(
+    loadout_votes, _stored_votes,
+    interval_ms=int(os.environ.get('LOADOUT_VOTE_BROADCAST_MS', 500))
+)
 
 @loadout_bp.route('/weapons', methods=['GET'])
 def get_weapons():
-    return jsonify({
-        "status": "success",
-        "weapons": weapons_db
-    })
+    return weapons_catalogue.respond()
 
 @loadout_bp.route('/skins', methods=['GET'])
 def get_skins():
     weapon_id = request.args.get('weapon_id', None)
     
-    if weapon_id:
-        filtered_skins = [skin for skin in skins_db if skin['weapon_id'] == weapon_id]
-    else:
-        filtered_skins = skins_db
-    
-    return jsonify({
-        "status": "success",
-        "skins": filtered_skins
-    })
+    return skins_catalogue.respond(weapon_id or None)
 
 @loadout_bp.route('/stickers', methods=['GET'])
 def get_stickers():
-    return jsonify({
-        "status": "success",
-        "stickers": stickers_db
-    })
+    return stickers_catalogue.respond()
 
 @loadout_bp.route('/loadouts', methods=['GET'])
 def get_loadouts():
     return jsonify({
         "status": "success",
-        "loadouts": loadouts_db
+        "loadouts": persistence.loadouts() if persistence.sql else loadouts_db
     })
 
+def _new_loadout(data, user_id, username):
+    return {
+        "id": f"loadout{len(loadouts_db) + 1}",
+        "user_id": user_id,
+        "username": username,
+        "weapon_id": data['weapon_id'],
+        "skin_id": data['skin_id'],
+        "stickers": data.get('stickers', []),
+        "color": data.get('color', "#FFFFFF"),
+        "votes": 0,
+        "created_at": "2025-05-25T00:00:00Z"  # Em uma implementação real, seria a data atual
+    }
+
 @loadout_bp.route('/loadouts', methods=['POST'])
 def create_loadout():
-    user_id = session.get('user_id')
-    if not user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    user_id = current_user.id
     
     data = request.get_json()
-    weapon_id = data.get('weapon_id')
-    skin_id = data.get('skin_id')
-    stickers = data.get('stickers', [])
-    color = data.get('color', "#FFFFFF")
-    
-    # Validar se a arma e a skin existem
-    weapon_exists = any(weapon['id'] == weapon_id for weapon in weapons_db)
-    skin_exists = any(skin['id'] == skin_id for skin in skins_db)
     
-    if not weapon_exists or not skin_exists:
+    errors = loadout_validator.validate(data)
+    if errors:
         return jsonify({
             "status": "error",
-            "message": "Arma ou skin inválida"
+            "message": "; ".join(errors),
+            "errors": errors
         }), 400
     
-    # Criar novo loadout
-    new_loadout = {
-        "id": f"loadout{len(loadouts_db) + 1}",
-        "user_id": user_id,
-        "username": "Username do Usuário",  # Em uma implementação real, seria obtido do banco de dados
-        "weapon_id": weapon_id,
-        "skin_id": skin_id,
-        "stickers": stickers,
-        "color": color,
-        "votes": 0,
-        "created_at": "2025-05-25T00:00:00Z"  # Em uma implementação real, seria a data atual
-    }
-    
+    new_loadout = _new_loadout(data, user_id, current_user.username)
     loadouts_db.append(new_loadout)
+    loadouts_by_id[new_loadout['id']] = new_loadout
+    persistence.put('loadouts', new_loadout['id'], new_loadout)
     
     return jsonify({
         "status": "success",
@@ -181,25 +215,76 @@ def create_loadout():
         "loadout": new_loadout
     }), 201
 
+@loadout_bp.route('/loadouts/bulk', methods=['POST'])
+def create_loadouts_bulk():
+    if not current_user.is_authenticated:
+        return jsonify({
+            "status": "error",
+            "message": "Usuário não autenticado"
+        }), 401
+    user_id = current_user.id
+    
+    data = request.get_json(silent=True) or {}
+    items = data.get('loadouts')
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            "status": "error",
+            "message": "Lista de loadouts vazia ou inválida"
+        }), 400
+    
+    if len(items) > MAX_BULK_LOADOUTS:
+        return jsonify({
+            "status": "error",
+            "message": f"Máximo de {MAX_BULK_LOADOUTS} loadouts por importação"
+        }), 413
+    
+    # Validação de todos os itens em uma única passada
+    invalid = dict(loadout_validator.validate_many(items))
+    
+    created = []
+    for index, item in enumerate(items):
+        if index not in invalid:
+            new_loadout = _new_loadout(item, user_id, current_user.username)
+            loadouts_db.append(new_loadout)
+            loadouts_by_id[new_loadout['id']] = new_loadout
+            persistence.put('loadouts', new_loadout['id'], new_loadout, wait=False)
+            created.append({"index": index, "id": new_loadout['id']})
+    # Um único fsync para o lote inteiro
+    persistence.sync()
+    
+    return jsonify({
+        "status": "success" if created else "error",
+        "message": f"{len(created)} loadouts criados, {len(invalid)} com erro",
+        "created": created,
+        "errors": [{"index": index, "errors": errors} for index, errors in invalid.items()]
+    }), 201 if created else 400
+
 @loadout_bp.route('/loadouts/<loadout_id>/vote', methods=['POST'])
 def vote_loadout(loadout_id):
-    user_id = session.get('user_id')
-    if not user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    user_id = current_user.id
     
-    for loadout in loadouts_db:
-        if loadout['id'] == loadout_id:
-            loadout['votes'] += 1
-            return jsonify({
-                "status": "success",
-                "message": "Voto registrado com sucesso",
-                "votes": loadout['votes']
-            })
+    result = vote_aggregator.vote(loadout_id, user_id)
+    if result is None:
+        return jsonify({
+            "status": "error",
+            "message": "Loadout não encontrado"
+        }), 404
+    
+    accepted, votes = result
+    if not accepted:
+        return jsonify({
+            "status": "success",
+            "message": "Você já votou neste loadout",
+            "votes": votes
+        })
     
     return jsonify({
-        "status": "error",
-        "message": "Loadout não encontrado"
-    }), 404
+        "status": "success",
+        "message": "Voto registrado com sucesso",
+        "votes": votes
+    })
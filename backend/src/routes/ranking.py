@@ -1,51 +1,46 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
 import json
 
+from src.services.follow_graph import FollowGraph
+from src.services.leaderboard import Leaderboard
+from src.services.persistence import persistence
+
 ranking_bp = Blueprint('ranking', __name__, url_prefix='/api/ranking')
 
 # Simulação de banco de dados de jogadores para ranking
-players_db = [
+players_db = persistence.load_list('players', [
     {
         "id": "user1",
         "username": "ProGamer123",
-        "rank": 1,
         "followers": 25000,
-        "clips": 87,
-        "following": True
+        "clips": 87
     },
     {
         "id": "user2",
         "username": "GameMaster",
-        "rank": 2,
         "followers": 18500,
-        "clips": 65,
-        "following": False
+        "clips": 65
     },
     {
         "id": "user3",
         "username": "NinjaStreamer",
-        "rank": 3,
         "followers": 15200,
-        "clips": 54,
-        "following": True
+        "clips": 54
     },
     {
         "id": "user4",
         "username": "GamerGirl",
-        "rank": 4,
         "followers": 12800,
-        "clips": 42,
-        "following": False
+        "clips": 42
     },
     {
         "id": "user5",
         "username": "EsportsLegend",
-        "rank": 5,
         "followers": 10500,
-        "clips": 38,
-        "following": False
+        "clips": 38
     }
-]
+])
 
 # Simulação de banco de dados de jogos
 games_db = [
@@ -56,27 +51,146 @@ games_db = [
     {"id": "game5", "name": "Valorant"}
 ]
 
+players_by_id = {player['id']: player for player in players_db}
+game_ids_by_name = {game['name']: game['id'] for game in games_db}
+games_by_id = {game['id']: game for game in games_db}
+
+# Rankings mantidos incrementalmente: global e um por jogo
+global_board = Leaderboard()
+game_boards = {game['id']: Leaderboard() for game in games_db}
+# jogador -> ids dos jogos em cujo ranking ele aparece
+player_games = {}
+
+# Relações de seguidores entre usuários
+follow_graph = FollowGraph()
+for _edge in persistence.load('follows', {}).values():
+    follow_graph.follow(_edge['follower'], _edge['followee'])
+
+def _persist_follow(follower_id, followee_id, following):
+    key = f"{follower_id}:{followee_id}"
+    if following:
+        persistence.put('follows', key, {"follower": follower_id, "followee": followee_id}, wait=False)
+    else:
+        persistence.delete('follows', key, wait=False)
+    persistence.put('players', followee_id, players_by_id[followee_id])
+
+def _player_score(player):
+    return (player['followers'], player['clips'])
+
+def _refresh_player(player):
+    score = _player_score(player)
+    global_board.update(player['id'], score)
+    for game_id in player_games.get(player['id'], ()):
+        game_boards[game_id].update(player['id'], score)
+
+for _player in players_db:
+    global_board.update(_player['id'], _player_score(_player))
+
+def index_player_game(user_id, game_name):
+    # Inclui o jogador no ranking do jogo sem alterar suas estatísticas
+    player = players_by_id.get(user_id)
+    game_id = game_ids_by_name.get(game_name)
+    if player and game_id in game_boards:
+        game_boards[game_id].update(user_id, _player_score(player))
+        player_games.setdefault(user_id, set()).add(game_id)
+
+def record_clip(user_id, game_name):
+    player = players_by_id.get(user_id)
+    if not player:
+        return
+    player['clips'] += 1
+    persistence.put('players', user_id, player, wait=False)
+    _refresh_player(player)
+    index_player_game(user_id, game_name)
+
+def _ranked(entries, viewer_id=None):
+    return [
+        dict(players_by_id[player_id], rank=rank,
+             following=follow_graph.is_following(viewer_id, player_id))
+        for player_id, rank in entries
+    ]
+
+def _top(board, game_id, limit, offset, viewer_id):
+    if not persistence.sql:
+        return _ranked(board.top(limit, offset), viewer_id)
+    # Modo SQL: ranking consultado no banco
+    game_name = games_by_id[game_id]['name'] if game_id else None
+    return [
+        dict(player, rank=rank, following=follow_graph.is_following(viewer_id, player['id']))
+        for player, rank in persistence.ranking(game_name, limit, offset)
+    ]
+
 @ranking_bp.route('/', methods=['GET'])
 def get_ranking():
     filter_type = request.args.get('filter', 'global')
     game_id = request.args.get('game_id', None)
     
+    limit = request.args.get('limit', None, type=int)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    current_user_id = current_user.id if current_user.is_authenticated else None
+    
     if filter_type == 'following':
-        # Em uma implementação real, filtraria com base nos usuários seguidos
-        filtered_players = [player for player in players_db if player['following']]
+        if not current_user_id:
+            return jsonify({
+                "status": "error",
+                "message": "Usuário não autenticado"
+            }), 401
+        
+        # Ordena apenas os jogadores seguidos pela chave já mantida no ranking
+        followed = sorted(
+            (player_id for player_id in follow_graph.following(current_user_id)
+             if player_id in global_board),
+            key=global_board.sort_key
+        )
+        end = offset + limit if limit is not None else None
+        entries = [(player_id, position) for position, player_id
+                   in enumerate(followed, start=1)][offset:end]
+        filtered_players = _ranked(entries, current_user_id)
     elif filter_type == 'game' and game_id:
-        # Em uma implementação real, filtraria com base no jogo
-        # Aqui estamos apenas simulando
-        filtered_players = players_db[:3]  # Primeiros 3 jogadores como exemplo
+        board = game_boards.get(game_id)
+        if board is None:
+            return jsonify({
+                "status": "error",
+                "message": "Jogo não encontrado"
+            }), 404
+        filtered_players = _top(board, game_id, limit, offset, current_user_id)
     else:
         # Ranking global
-        filtered_players = players_db
+        filtered_players = _top(global_board, None, limit, offset, current_user_id)
     
     return jsonify({
         "status": "success",
         "ranking": filtered_players
     })
 
+@ranking_bp.route('/players/<user_id>/rank', methods=['GET'])
+def get_player_rank(user_id):
+    game_id = request.args.get('game_id', None)
+    
+    if game_id:
+        board = game_boards.get(game_id)
+        if board is None:
+            return jsonify({
+                "status": "error",
+                "message": "Jogo não encontrado"
+            }), 404
+    else:
+        board = global_board
+    
+    rank = board.rank(user_id)
+    if rank is None:
+        return jsonify({
+            "status": "error",
+            "message": "Jogador não está neste ranking"
+        }), 404
+    
+    return jsonify({
+        "status": "success",
+        "user_id": user_id,
+        "rank": rank,
+        "total": len(board)
+    })
+
 @ranking_bp.route('/games', methods=['GET'])
 def get_games():
     return jsonify({
@@ -86,20 +200,29 @@ def get_games():
 
 @ranking_bp.route('/follow/<user_id>', methods=['POST'])
 def follow_user(user_id):
-    current_user_id = session.get('user_id')
-    if not current_user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    current_user_id = current_user.id
     
-    for player in players_db:
-        if player['id'] == user_id:
-            player['following'] = True
-            return jsonify({
-                "status": "success",
-                "message": f"Agora você está seguindo {player['username']}"
-            })
+    if user_id == current_user_id:
+        return jsonify({
+            "status": "error",
+            "message": "Você não pode seguir a si mesmo"
+        }), 400
+    
+    player = players_by_id.get(user_id)
+    if player:
+        if follow_graph.follow(current_user_id, user_id):
+            player['followers'] = player['followers'] + 1
+            _persist_follow(current_user_id, user_id, True)
+            _refresh_player(player)
+        return jsonify({
+            "status": "success",
+            "message": f"Agora você está seguindo {player['username']}"
+        })
     
     return jsonify({
         "status": "error",
@@ -108,22 +231,44 @@ def follow_user(user_id):
 
 @ranking_bp.route('/unfollow/<user_id>', methods=['POST'])
 def unfollow_user(user_id):
-    current_user_id = session.get('user_id')
-    if not current_user_id:
+    if not current_user.is_authenticated:
         return jsonify({
             "status": "error",
             "message": "Usuário não autenticado"
         }), 401
+    current_user_id = current_user.id
     
-    for player in players_db:
-        if player['id'] == user_id:
-            player['following'] = False
-            return jsonify({
-                "status": "success",
-                "message": f"Você deixou de seguir {player['username']}"
-            })
+    player = players_by_id.get(user_id)
+    if player:
+        if follow_graph.unfollow(current_user_id, user_id):
+            player['followers'] = player['followers'] - 1
+            _persist_follow(current_user_id, user_id, False)
+            _refresh_player(player)
+        return jsonify({
+            "status": "success",
+            "message": f"Você deixou de seguir {player['username']}"
+        })
     
     return jsonify({
         "status": "error",
         "message": "Usuário não encontrado"
     }), 404
+
+@ranking_bp.route('/relationship/<user_id>', methods=['GET'])
+def get_relationship(user_id):
+    if not current_user.is_authenticated:
+        return jsonify({
+            "status": "error",
+            "message": "Usuário não autenticado"
+        }), 401
+    current_user_id = current_user.id
+    
+    return jsonify({
+        "status": "success",
+        "user_id": user_id,
+        "following": follow_graph.is_following(current_user_id, user_id),
+        "followed_by": follow_graph.is_following(user_id, current_user_id),
+        "mutual": follow_graph.is_mutual(current_user_id, user_id),
+        "followers_count": follow_graph.followers_count(user_id),
+        "following_count": follow_graph.following_count(user_id)
+    })
@@ -0,0 +1,82 @@
+# Estado autoritativo de uma partida do jogo da bomba.
+# O servidor guarda a sequência esperada e valida cada tecla em O(1);
+# o resultado e a recompensa são calculados aqui, não no cliente.
+import secrets
+import time
+
+# Mesma tabela de dificuldades usada pelo cliente cooperativo
+DIFFICULTIES = {
+    'easy': (6, 60, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'),
+    'medium': (8, 45, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'),
+    'hard': (10, 30, 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'),
+    'extreme': (12, 20, 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789!@#$%^&*()'),
+}
+
+PLAYING = 'playing'
+SUCCESS = 'success'
+FAILURE = 'failure'
+
+
+def generate_sequence(difficulty):
+    length, time_limit, chars = DIFFICULTIES.get(difficulty, DIFFICULTIES['medium'])
+    return ''.join(secrets.choice(chars) for _ in range(length)), time_limit
+
+
+def calculate_reward(time_taken):
+    return max(10, 100 - int(time_taken))
+
+
+class BombGameState:
+    __slots__ = ('game_id', 'sequence', 'cursor', 'mistakes', 'started_at',
+                 'time_limit', 'status', 'time_taken', 'reward')
+
+    def __init__(self, sequence, time_limit):
+        self.game_id = secrets.token_hex(8)
+        self.sequence = sequence
+        self.cursor = 0
+        self.mistakes = 0
+        self.started_at = time.monotonic()
+        self.time_limit = time_limit
+        self.status = PLAYING
+        self.time_taken = None
+        self.reward = 0
+
+    @property
+    def finished(self):
+        return self.status != PLAYING
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def _finish(self, status):
+        self.status = status
+        self.time_taken = round(min(self.elapsed(), self.time_limit), 2)
+        self.reward = calculate_reward(self.time_taken) if status == SUCCESS else 0
+
+    def check_timeout(self):
+        if self.status == PLAYING and self.elapsed() >= self.time_limit:
+            self._finish(FAILURE)
+        return self.finished
+
+    def apply_input(self, char, position):
+        # Retorna True se a tecla foi aceita na posição atual
+        if self.check_timeout():
+            return False
+        if position != self.cursor or not isinstance(char, str) or len(char) != 1:
+            return False
+
+        # Erros não interrompem a digitação; só decidem o resultado no fim
+        if char != self.sequence[self.cursor]:
+            self.mistakes += 1
+        self.cursor += 1
+
+        if self.cursor == len(self.sequence):
+            self._finish(SUCCESS if self.mistakes == 0 else FAILURE)
+        return True
+
+    def result(self):
+        return {
+            'success': self.status == SUCCESS,
+            'time_taken': self.time_taken,
+            'reward': self.reward
+        }
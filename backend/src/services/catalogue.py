@@ -0,0 +1,59 @@
+# Catálogos estáticos servidos a partir de respostas pré-serializadas.
+# Cada variante (catálogo inteiro ou agrupado por um campo) é serializada
+# uma única vez por versão e servida com ETag forte e suporte a 304.
+import hashlib
+import threading
+
+from flask import current_app, request
+
+
+class Catalogue:
+    def __init__(self, field, items, group_by=None):
+        self._field = field
+        self._items = items
+        self._group_by = group_by
+        self._groups = {}
+        self._responses = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self._build_groups()
+
+    def _build_groups(self):
+        groups = {}
+        if self._group_by:
+            for item in self._items:
+                groups.setdefault(item[self._group_by], []).append(item)
+        self._groups = groups
+
+    def invalidate(self):
+        # Chamar após alterar a lista de itens do catálogo
+        with self._lock:
+            self.version += 1
+            self._build_groups()
+            self._responses.clear()
+
+    def items(self, group=None):
+        if group is None:
+            return self._items
+        return self._groups.get(group, [])
+
+    def _serialized(self, group):
+        # Grupos desconhecidos compartilham a mesma resposta vazia
+        key = group if group is None or group in self._groups else ()
+        entry = self._responses.get(key)
+        if entry is None:
+            items = self._items if key is None else self._groups.get(key, [])
+            body = f"{current_app.json.dumps({'status': 'success', self._field: items})}\n"
+            body = body.encode('utf-8')
+            entry = (body, hashlib.sha256(body).hexdigest())
+            with self._lock:
+                self._responses[key] = entry
+        return entry
+
+    def respond(self, group=None):
+        body, etag = self._serialized(group)
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
@@ -0,0 +1,243 @@
+# Repositório em memória para clipes com índices secundários.
+# Substitui a lista simples para que buscas por id e filtros
+# não precisem percorrer o catálogo inteiro a cada requisição.
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+INDEXED_FIELDS = ('category', 'game', 'user_id')
+
+# Ordenações suportadas pelo feed -> campo do clipe usado como pontuação
+SORT_ORDERS = {
+    'newest': 'created_at',
+    'views': 'views',
+    'likes': 'likes',
+}
+
+
+def parse_timestamp(value):
+    if not value:
+        return 0.0
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _score(clip, field):
+    value = clip.get(field)
+    if field == 'created_at':
+        return parse_timestamp(value)
+    return value or 0
+
+
+def encode_cursor(key):
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        score, clip_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(score, (int, float)) or not isinstance(clip_id, str):
+        raise ValueError("Cursor inválido")
+    return (score, clip_id)
+
+
+class SortedIndex:
+    # Lista de chaves (-pontuação, clip_id) mantida ordenada com bisect
+    def __init__(self):
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def insert(self, key):
+        insort(self._keys, key)
+
+    def remove(self, key):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def iter_after(self, key=None):
+        start = 0 if key is None else bisect_right(self._keys, key)
+        for i in range(start, len(self._keys)):
+            yield self._keys[i]
+
+
+class ClipRepository:
+    def __init__(self, clips=None, indexed_fields=INDEXED_FIELDS):
+        self._by_id = {}
+        self._indexed_fields = tuple(indexed_fields)
+        # campo -> valor -> {clip_id: clip}; dicts preservam a ordem de inserção
+        self._indexes = {field: {} for field in self._indexed_fields}
+        self._sequence = 0
+        self._sequence_lock = threading.Lock()
+        # ordenação -> (campo, valor) ou None para o catálogo todo -> SortedIndex
+        self._sorted = {order: {None: SortedIndex()} for order in SORT_ORDERS}
+        # Callbacks chamados com o clipe após inserções e incrementos
+        self._listeners = []
+
+        for clip in clips or []:
+            self.add(clip)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, clip_id):
+        return clip_id in self._by_id
+
+    def next_id(self):
+        return f"clip{self._sequence + 1}"
+
+    def allocate_id(self):
+        # Reserva o próximo id; chamadas simultâneas nunca recebem o mesmo
+        with self._sequence_lock:
+            self._sequence += 1
+            return f"clip{self._sequence}"
+
+    def get(self, clip_id):
+        return self._by_id.get(clip_id)
+
+    def add(self, clip):
+        clip_id = clip['id']
+        if clip_id in self._by_id:
+            raise KeyError(f"Clipe duplicado: {clip_id}")
+
+        self._by_id[clip_id] = clip
+        for field in self._indexed_fields:
+            self._indexes[field].setdefault(clip.get(field), {})[clip_id] = clip
+        self._insert_sorted(clip)
+
+        # Mantém o contador à frente de ids numéricos já existentes
+        suffix = clip_id[4:] if clip_id.startswith('clip') else ''
+        with self._sequence_lock:
+            if suffix.isdigit():
+                self._sequence = max(self._sequence, int(suffix))
+            else:
+                self._sequence += 1
+
+        for listener in self._listeners:
+            listener(clip)
+        return clip
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def all(self):
+        return list(self._by_id.values())
+
+    def filter(self, **criteria):
+        # Sem critérios: devolve o catálogo completo
+        buckets = []
+        for field, value in criteria.items():
+            if value is None:
+                continue
+            if field not in self._indexes:
+                raise ValueError(f"Campo não indexado: {field}")
+            buckets.append(self._indexes[field].get(value, {}))
+
+        if not buckets:
+            return self.all()
+
+        # Percorre apenas o menor índice e confere os demais em O(1)
+        buckets.sort(key=len)
+        smallest, others = buckets[0], buckets[1:]
+        return [
+            clip for clip_id, clip in smallest.items()
+            if all(clip_id in bucket for bucket in others)
+        ]
+
+    def update(self, clip_id, **fields):
+        # Campos descritivos (status, metadados de mídia); campos indexados
+        # ou de ordenação exigiriam reindexar o clipe
+        clip = self._by_id.get(clip_id)
+        if clip is None:
+            return None
+        protected = set(self._indexed_fields) | set(SORT_ORDERS.values()) | {'id'}
+        if protected.intersection(fields):
+            raise ValueError(f"Campos não atualizáveis: {sorted(protected.intersection(fields))}")
+
+        clip.update(fields)
+        for listener in self._listeners:
+            listener(clip)
+        return clip
+
+    def increment(self, clip_id, field, amount=1):
+        clip = self._by_id.get(clip_id)
+        if clip is None:
+            return None
+
+        orders = [order for order, sort_field in SORT_ORDERS.items() if sort_field == field]
+        for order in orders:
+            self._remove_sorted(clip, order)
+        clip[field] = clip.get(field, 0) + amount
+        for order in orders:
+            self._insert_sorted(clip, order)
+
+        for listener in self._listeners:
+            listener(clip)
+        return clip[field]
+
+    def page(self, order='newest', limit=20, cursor=None, **criteria):
+        # Paginação por chave: O(log n + tamanho da página) no caso sem filtros
+        if order not in SORT_ORDERS:
+            raise ValueError(f"Ordenação inválida: {order}")
+        after = decode_cursor(cursor) if cursor else None
+
+        scopes = []
+        for field, value in criteria.items():
+            if value is None:
+                continue
+            if field not in self._indexes:
+                raise ValueError(f"Campo não indexado: {field}")
+            scopes.append((field, value))
+
+        if not scopes:
+            index, others = self._sorted[order][None], []
+        else:
+            # Percorre o menor escopo ordenado e confere os demais critérios
+            scopes.sort(key=lambda scope: len(self._indexes[scope[0]].get(scope[1], {})))
+            index = self._sorted[order].get(scopes[0])
+            if index is None:
+                return [], None
+            others = [self._indexes[field].get(value, {}) for field, value in scopes[1:]]
+
+        clips = []
+        last_key = None
+        for key in index.iter_after(after):
+            clip_id = key[1]
+            if any(clip_id not in bucket for bucket in others):
+                continue
+            if len(clips) == limit:
+                return clips, encode_cursor(last_key)
+            clips.append(self._by_id[clip_id])
+            last_key = key
+        return clips, None
+
+    def _sort_key(self, clip, order):
+        return (-_score(clip, SORT_ORDERS[order]), clip['id'])
+
+    def _scopes(self, clip):
+        yield None
+        for field in self._indexed_fields:
+            yield (field, clip.get(field))
+
+    def _insert_sorted(self, clip, order=None):
+        orders = [order] if order else list(SORT_ORDERS)
+        for current in orders:
+            key = self._sort_key(clip, current)
+            for scope in self._scopes(clip):
+                self._sorted[current].setdefault(scope, SortedIndex()).insert(key)
+
+    def _remove_sorted(self, clip, order):
+        key = self._sort_key(clip, order)
+        for scope in self._scopes(clip):
+            index = self._sorted[order].get(scope)
+            if index is not None:
+                index.remove(key)
@@ -0,0 +1,75 @@
+# Compressão das respostas negociada por Accept-Encoding.
+# Brotli quando o pacote está instalado e o cliente aceita, senão gzip;
+# respostas pequenas, já codificadas, parciais ou enviadas por sendfile
+# seguem sem compressão.
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+)
+
+
+def negotiate_encoding(accept_encodings):
+    # Codificação preferida pelo cliente entre as disponíveis
+    candidates = []
+    if brotli is not None:
+        candidates.append('br')
+    candidates.append('gzip')
+    best = max(candidates, key=lambda coding: accept_encodings[coding])
+    return best if accept_encodings[best] > 0 else None
+
+
+class Compressor:
+    def __init__(self, min_size=DEFAULT_MIN_SIZE, gzip_level=DEFAULT_GZIP_LEVEL,
+                 brotli_quality=DEFAULT_BROTLI_QUALITY):
+        self._min_size = min_size
+        self._gzip_level = gzip_level
+        self._brotli_quality = brotli_quality
+
+    def init_app(self, app):
+        app.after_request(self._after_request)
+
+    def _compressible(self, response):
+        if response.direct_passthrough or response.is_streamed:
+            return False
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+    def compress(self, data, coding):
+        if coding == 'br':
+            return brotli.compress(data, quality=self._brotli_quality)
+        return gzip.compress(data, compresslevel=self._gzip_level, mtime=0)
+
+    def _after_request(self, response):
+        if not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        data = response.get_data()
+        if len(data) < self._min_size:
+            return response
+        coding = negotiate_encoding(request.accept_encodings)
+        if coding is None:
+            return response
+
+        response.set_data(self.compress(data, coding))
+        response.headers['Content-Encoding'] = coding
+        # O corpo mudou: a ETag passa a ser fraca, e o 304 continua valendo
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
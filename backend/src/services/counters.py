@@ -0,0 +1,123 @@
+# Contadores com escrita adiada (write-behind) para curtidas e votos.
+# Os incrementos ficam em memória, divididos em shards com locks próprios,
+# e são enviados ao armazenamento em lote a cada intervalo.
+import atexit
+import threading
+from collections import defaultdict
+
+DEFAULT_SHARDS = 16
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+
+class _Shard:
+    __slots__ = ('lock', 'pending', 'inflight', 'voters')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(int)
+        # Deltas retirados de pending que o sink ainda está aplicando
+        self.inflight = {}
+        # chave -> conjunto de usuários que já contaram para ela
+        self.voters = defaultdict(set)
+
+
+class CounterEngine:
+    def __init__(self, sink, shards=DEFAULT_SHARDS, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 on_counted=None):
+        # sink recebe {chave: delta} e persiste os valores agregados;
+        # on_counted(chave, usuário) registra cada novo usuário deduplicado
+        self._sink = sink
+        self._on_counted = on_counted
+        self._shards = [_Shard() for _ in range(shards)]
+        self._flush_interval = flush_interval
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def seed(self, key, user_ids):
+        # Registra usuários que já contaram antes do processo iniciar
+        shard = self._shard(key)
+        with shard.lock:
+            shard.voters[key].update(user_ids)
+
+    def increment(self, key, user_id=None, amount=1):
+        shard = self._shard(key)
+        with shard.lock:
+            if user_id is not None:
+                voters = shard.voters[key]
+                if user_id in voters:
+                    return False
+                voters.add(user_id)
+            shard.pending[key] += amount
+        if user_id is not None and self._on_counted is not None:
+            self._on_counted(key, user_id)
+        return True
+
+    def has_counted(self, key, user_id):
+        shard = self._shard(key)
+        with shard.lock:
+            return user_id in shard.voters.get(key, ())
+
+    def pending(self, key):
+        shard = self._shard(key)
+        with shard.lock:
+            return shard.pending.get(key, 0) + shard.inflight.get(key, 0)
+
+    def value(self, key, stored):
+        # Leitura: valor persistido + deltas ainda não enviados
+        return stored + self.pending(key)
+
+    def flush(self):
+        with self._flush_lock:
+            deltas = defaultdict(int)
+            for shard in self._shards:
+                with shard.lock:
+                    pending, shard.pending = shard.pending, defaultdict(int)
+                    # Continuam visíveis em value() até o sink terminar
+                    shard.inflight = dict(pending)
+                for key, delta in pending.items():
+                    deltas[key] += delta
+
+            deltas = {key: delta for key, delta in deltas.items() if delta}
+            try:
+                if deltas:
+                    self._sink(deltas)
+            except Exception:
+                # Devolve os deltas para a próxima tentativa
+                for shard in self._shards:
+                    with shard.lock:
+                        for key, delta in shard.inflight.items():
+                            shard.pending[key] += delta
+                        shard.inflight = {}
+                raise
+            for shard in self._shards:
+                with shard.lock:
+                    shard.inflight = {}
+            return len(deltas)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Falha no armazenamento: os deltas continuam pendentes
+                continue
@@ -0,0 +1,80 @@
+# Grafo de seguidores com listas de adjacência de entrada e saída.
+# Os ids de usuário são mapeados para inteiros compactos, então consultas
+# de "quem eu sigo", contagens e seguidores mútuos custam O(grau).
+
+
+class FollowGraph:
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+        self._out = []
+        self._in = []
+
+    def _intern(self, user_id):
+        index = self._ids.get(user_id)
+        if index is None:
+            index = len(self._names)
+            self._ids[user_id] = index
+            self._names.append(user_id)
+            self._out.append(set())
+            self._in.append(set())
+        return index
+
+    def follow(self, follower_id, followee_id):
+        if follower_id == followee_id:
+            raise ValueError("Usuário não pode seguir a si mesmo")
+        source = self._intern(follower_id)
+        target = self._intern(followee_id)
+        if target in self._out[source]:
+            return False
+        self._out[source].add(target)
+        self._in[target].add(source)
+        return True
+
+    def unfollow(self, follower_id, followee_id):
+        source = self._ids.get(follower_id)
+        target = self._ids.get(followee_id)
+        if source is None or target is None or target not in self._out[source]:
+            return False
+        self._out[source].discard(target)
+        self._in[target].discard(source)
+        return True
+
+    def is_following(self, follower_id, followee_id):
+        source = self._ids.get(follower_id)
+        target = self._ids.get(followee_id)
+        if source is None or target is None:
+            return False
+        return target in self._out[source]
+
+    def is_mutual(self, user_a, user_b):
+        return self.is_following(user_a, user_b) and self.is_following(user_b, user_a)
+
+    def following(self, user_id):
+        index = self._ids.get(user_id)
+        if index is None:
+            return []
+        return [self._names[target] for target in self._out[index]]
+
+    def followers(self, user_id):
+        index = self._ids.get(user_id)
+        if index is None:
+            return []
+        return [self._names[source] for source in self._in[index]]
+
+    def mutuals(self, user_id):
+        index = self._ids.get(user_id)
+        if index is None:
+            return []
+        return [self._names[other] for other in self._out[index] & self._in[index]]
+
+    def following_count(self, user_id):
+        index = self._ids.get(user_id)
+        return 0 if index is None else len(self._out[index])
+
+    def followers_count(self, user_id):
+        index = self._ids.get(user_id)
+        return 0 if index is None else len(self._in[index])
+
+    def edge_count(self):
+        return sum(len(targets) for targets in self._out)
@@ -0,0 +1,57 @@
+# Serialização JSON das respostas com backend plugável.
+# Usa orjson quando instalado (JSON_BACKEND=auto|orjson|stdlib) e cai para
+# o json da biblioteca padrão com separadores compactos. As respostas nunca
+# são indentadas, independente do modo debug.
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        backend = backend or os.environ.get('JSON_BACKEND', 'auto')
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'stdlib'
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson, mas o pacote orjson não está instalado")
+        if backend not in ('orjson', 'stdlib'):
+            raise ValueError(f"Backend JSON desconhecido: {backend}")
+        self.backend = backend
+
+    def _orjson_options(self):
+        # Datas continuam no formato HTTP do Flask (via default)
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def encode(self, obj):
+        # Bytes prontos para o corpo da resposta, sem decodificar/recodificar
+        if self.backend == 'orjson':
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+        return self.dumps(obj).encode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b"\n", mimetype=self.mimetype)
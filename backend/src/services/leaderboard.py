@@ -0,0 +1,147 @@
+# Ranking incremental baseado em skip list indexável.
+# Cada nó guarda a largura dos seus links, o que permite calcular a posição
+# de um jogador e buscar o top K em O(log n) sem reordenar a população.
+import random
+
+MAX_LEVELS = 24
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    def __init__(self, max_levels=MAX_LEVELS):
+        self._max_levels = max_levels
+        self._head = _Node(None, max_levels)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        level = 1
+        while level < self._max_levels and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _predecessors(self, key):
+        chain = [None] * self._max_levels
+        steps = [0] * self._max_levels
+        node = self._head
+        for level in reversed(range(self._max_levels)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps_at_level = self._predecessors(key)
+        levels = self._random_level()
+        node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            node.next[level] = prev.next[level]
+            prev.next[level] = node
+            node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self._max_levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._predecessors(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        levels = len(node.next)
+        for level in range(levels):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(levels, self._max_levels):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key):
+        # Posição (0-based) da chave na ordem crescente
+        node = self._head
+        position = 0
+        for level in reversed(range(self._max_levels)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        node = node.next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return position
+
+    def iter_from(self, index):
+        if index < 0 or index >= self._size:
+            return
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(self._max_levels)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    # Pontuações maiores ficam no topo; o id do membro desempata
+    def __init__(self):
+        self._keys = {}
+        self._list = IndexableSkipList()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, member_id):
+        return member_id in self._keys
+
+    def _make_key(self, member_id, score):
+        return tuple(-value for value in score) + (member_id,)
+
+    def update(self, member_id, score):
+        key = self._make_key(member_id, score)
+        old_key = self._keys.get(member_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._list.remove(old_key)
+        self._list.insert(key)
+        self._keys[member_id] = key
+
+    def remove(self, member_id):
+        key = self._keys.pop(member_id, None)
+        if key is not None:
+            self._list.remove(key)
+
+    def sort_key(self, member_id):
+        return self._keys[member_id]
+
+    def rank(self, member_id):
+        key = self._keys.get(member_id)
+        if key is None:
+            return None
+        return self._list.index(key) + 1
+
+    def top(self, limit=None, offset=0):
+        # Lista de (member_id, posição) a partir de offset
+        entries = []
+        for position, key in enumerate(self._list.iter_from(offset), start=offset + 1):
+            if limit is not None and len(entries) >= limit:
+                break
+            entries.append((key[-1], position))
+        return entries
@@ -0,0 +1,97 @@
+# Sincronização de loadouts em edição colaborativa por patches versionados.
+# O servidor mantém o loadout canônico de cada sala enquanto houver alguém
+# nela; os clientes enviam apenas os campos alterados junto com a versão em
+# que se basearam, e os valores são validados contra os catálogos.
+import threading
+
+EDITABLE_FIELDS = frozenset(('weapon_id', 'skin_id', 'stickers', 'color'))
+
+
+class LoadoutDocument:
+    __slots__ = ('version', 'fields', 'lock')
+
+    def __init__(self):
+        self.version = 0
+        self.fields = {}
+        self.lock = threading.Lock()
+
+
+class LoadoutSyncHub:
+    def __init__(self, validator=None):
+        self._validator = validator
+        self._documents = {}
+        # sala -> sids conectados; o documento é liberado quando esvazia
+        self._members = {}
+        self._lock = threading.Lock()
+
+    def join(self, room, sid):
+        with self._lock:
+            self._members.setdefault(room, set()).add(sid)
+            self._documents.setdefault(room, LoadoutDocument())
+
+    def leave(self, room, sid):
+        # Retorna True se a sala ficou vazia (e o documento foi liberado)
+        with self._lock:
+            members = self._members.get(room)
+            if members is None:
+                return False
+            members.discard(sid)
+            if members:
+                return False
+            del self._members[room]
+            self._documents.pop(room, None)
+            return True
+
+    def leave_all(self, sid):
+        # Salas que ficaram vazias com a saída desta conexão
+        with self._lock:
+            rooms = [room for room, members in self._members.items() if sid in members]
+        return [room for room in rooms if self.leave(room, sid)]
+
+    def snapshot(self, room):
+        document = self._documents.get(room)
+        if document is None:
+            return {'version': 0, 'loadout': {}}
+        with document.lock:
+            return {'version': document.version, 'loadout': dict(document.fields)}
+
+    def apply(self, room, base_version, changes):
+        # Retorna (patch, erro); patch tem a nova versão e só os campos alterados
+        if isinstance(base_version, bool) or not isinstance(base_version, int):
+            return None, 'invalid'
+        return self._apply(room, base_version, changes)
+
+    def replace(self, room, loadout):
+        # Compatibilidade com envios do loadout completo: vira um patch sem
+        # verificação de versão (o último envio prevalece)
+        if not isinstance(loadout, dict):
+            return None, 'invalid'
+        changes = {field: value for field, value in loadout.items() if field in EDITABLE_FIELDS}
+        return self._apply(room, None, changes)
+
+    def _apply(self, room, base_version, changes):
+        if not isinstance(changes, dict) or not changes:
+            return None, 'invalid'
+        if any(field not in EDITABLE_FIELDS for field in changes):
+            return None, 'invalid'
+
+        document = self._documents.get(room)
+        if document is None:
+            return None, 'not_in_room'
+        with document.lock:
+            if base_version is not None and base_version != document.version:
+                return None, 'version_gap'
+
+            # Descarta alterações que não mudam o valor atual
+            effective = {field: value for field, value in changes.items()
+                         if document.fields.get(field) != value}
+            if not effective:
+                return {'version': document.version, 'changes': {}}, None
+
+            if self._validator is not None and \
+                    self._validator.validate_partial(dict(document.fields, **effective)):
+                return None, 'invalid'
+
+            document.fields.update(effective)
+            document.version += 1
+            return {'version': document.version, 'changes': effective}, None
@@ -0,0 +1,71 @@
+# Validação de loadouts contra conjuntos de ids e o mapa skin -> arma.
+# Cada item é validado em O(1 + stickers), o que permite importar milhares
+# de loadouts em uma única passada.
+import re
+
+MAX_STICKERS = 5
+COLOR_PATTERN = re.compile(r'^#[0-9A-Fa-f]{6}$')
+
+
+class LoadoutValidator:
+    def __init__(self, weapons, skins, stickers, max_stickers=MAX_STICKERS):
+        self._weapons = weapons
+        self._skins = skins
+        self._stickers = stickers
+        self.max_stickers = max_stickers
+        self.refresh()
+
+    def refresh(self):
+        # Reconstrói os índices após alterações nos catálogos
+        self._weapon_ids = frozenset(weapon['id'] for weapon in self._weapons)
+        self._skin_weapon = {skin['id']: skin['weapon_id'] for skin in self._skins}
+        self._sticker_ids = frozenset(sticker['id'] for sticker in self._stickers)
+
+    def validate(self, data):
+        # Retorna a lista de erros do item (vazia se válido)
+        if not isinstance(data, dict):
+            return ["Loadout inválido"]
+        return self.validate_partial({
+            'weapon_id': data.get('weapon_id'),
+            'skin_id': data.get('skin_id'),
+            'stickers': data.get('stickers', []),
+            'color': data.get('color', "#FFFFFF"),
+        })
+
+    def validate_partial(self, data):
+        # Valida apenas os campos presentes (loadouts em edição por patches)
+        errors = []
+        weapon_id = data.get('weapon_id')
+
+        if 'weapon_id' in data and weapon_id not in self._weapon_ids:
+            errors.append("Arma inválida")
+        if 'skin_id' in data:
+            skin_weapon = self._skin_weapon.get(data['skin_id'])
+            if skin_weapon is None:
+                errors.append("Skin inválida")
+            elif weapon_id in self._weapon_ids and skin_weapon != weapon_id:
+                errors.append("Skin não pertence à arma")
+
+        if 'stickers' in data:
+            stickers = data['stickers']
+            if not isinstance(stickers, list):
+                errors.append("Stickers inválidos")
+            else:
+                if len(stickers) > self.max_stickers:
+                    errors.append(f"Máximo de {self.max_stickers} stickers")
+                invalid = [sticker for sticker in stickers
+                           if not isinstance(sticker, str) or sticker not in self._sticker_ids]
+                if invalid:
+                    errors.append("Sticker inválido: " + ", ".join(str(sticker) for sticker in invalid))
+
+        if 'color' in data:
+            color = data['color']
+            if not isinstance(color, str) or not COLOR_PATTERN.match(color):
+                errors.append("Cor inválida")
+        return errors
+
+    def validate_many(self, items):
+        # Lista de (índice, erros) apenas para os itens inválidos
+        return [(index, errors) for index, errors
+                in ((index, self.validate(item)) for index, item in enumerate(items))
+                if errors]
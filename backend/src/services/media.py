@@ -0,0 +1,127 @@
+# Processamento de vídeos enviados: metadados e thumbnail.
+# Roda em um pool de processos limitado para nunca bloquear as requisições;
+# o resultado é aplicado ao clipe por callback quando o trabalho termina.
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+THUMBNAIL_SIZE = (640, 360)
+
+
+def _probe(video_path):
+    metadata = {"size": os.path.getsize(video_path)}
+    if not shutil.which('ffprobe'):
+        return metadata
+
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=width,height,codec_name:format=duration',
+         '-of', 'json', video_path],
+        capture_output=True, timeout=30, check=True
+    ).stdout
+    info = json.loads(output or b'{}')
+    stream = (info.get('streams') or [{}])[0]
+    duration = info.get('format', {}).get('duration')
+    metadata.update({
+        "duration": round(float(duration), 2) if duration else None,
+        "width": stream.get('width'),
+        "height": stream.get('height'),
+        "codec": stream.get('codec_name')
+    })
+    return metadata
+
+
+def _render_thumbnail(video_path, thumbnail_path, size):
+    from PIL import Image
+
+    frame_path = None
+    try:
+        if shutil.which('ffmpeg'):
+            # Extrai um quadro do início do vídeo
+            handle, frame_path = tempfile.mkstemp(suffix='.png')
+            os.close(handle)
+            subprocess.run(
+                ['ffmpeg', '-y', '-v', 'error', '-ss', '1', '-i', video_path,
+                 '-frames:v', '1', frame_path],
+                capture_output=True, timeout=60, check=True
+            )
+            image = Image.open(frame_path)
+        else:
+            # Sem ffmpeg no ambiente: thumbnail neutra no tamanho padrão
+            image = Image.new('RGB', size, (24, 24, 32))
+
+        image = image.convert('RGB')
+        image.thumbnail(size)
+        image.save(thumbnail_path, 'JPEG', quality=85, optimize=True)
+    finally:
+        if frame_path and os.path.exists(frame_path):
+            os.remove(frame_path)
+
+
+def process_clip_media(video_path, thumbnail_path, size=THUMBNAIL_SIZE):
+    # Executado no processo do pool
+    metadata = _probe(video_path)
+    _render_thumbnail(video_path, thumbnail_path, size)
+    return metadata
+
+
+class MediaPipeline:
+    def __init__(self, max_workers=2, max_in_flight=8):
+        self._max_workers = max_workers
+        self._max_in_flight = max_in_flight
+        self._executor = None
+        self._backlog = deque()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn evita herdar threads/locks do servidor no fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def submit(self, video_path, thumbnail_path, on_done):
+        # on_done(metadados, erro) é chamado quando o processamento termina
+        with self._lock:
+            self._backlog.append((video_path, thumbnail_path, on_done))
+        self._dispatch()
+
+    def pending(self):
+        with self._lock:
+            return len(self._backlog) + self._in_flight
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._in_flight >= self._max_in_flight or not self._backlog:
+                    return
+                video_path, thumbnail_path, on_done = self._backlog.popleft()
+                self._in_flight += 1
+                future = self._pool().submit(process_clip_media, video_path, thumbnail_path)
+            future.add_done_callback(lambda done, on_done=on_done: self._finished(done, on_done))
+
+    def _finished(self, future, on_done):
+        with self._lock:
+            self._in_flight -= 1
+        try:
+            metadata, error = future.result(), None
+        except Exception as exc:
+            metadata, error = None, exc
+        try:
+            on_done(metadata, error)
+        finally:
+            self._dispatch()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
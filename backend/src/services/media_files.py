@@ -0,0 +1,82 @@
+# Envio de arquivos de vídeo com suporte a Range (206) e requisições
+# condicionais. No gunicorn o corpo usa wsgi.file_wrapper, que envia com
+# sendfile a partir da posição atual do arquivo até o Content-Length.
+import mimetypes
+import os
+from datetime import datetime, timezone
+
+from flask import current_app
+
+BLOCK_SIZE = 256 * 1024
+
+
+def _read_range(handle, length):
+    try:
+        while length > 0:
+            chunk = handle.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def _file_body(environ, handle, length):
+    wrapper = environ.get('wsgi.file_wrapper')
+    if wrapper is not None and environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        return wrapper(handle, BLOCK_SIZE)
+    # Outros servidores podem ler até o fim do arquivo: limita manualmente
+    return _read_range(handle, length)
+
+
+def send_media(request, path):
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = f"{stat.st_mtime_ns:x}-{size:x}"
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+
+    response = current_app.response_class(
+        mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    )
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.accept_ranges = 'bytes'
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+
+    # Requisições condicionais: nada mudou, nada a enviar
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(request.if_modified_since and last_modified <= request.if_modified_since)
+    if not_modified:
+        response.status_code = 304
+        return response
+
+    start, stop = 0, size
+    byte_range = request.range
+    use_range = byte_range is not None and len(byte_range.ranges) == 1
+    if use_range and request.if_range:
+        # If-Range diferente da versão atual: envia o arquivo inteiro
+        if request.if_range.etag is not None:
+            use_range = request.if_range.etag == etag
+        elif request.if_range.date is not None:
+            use_range = last_modified <= request.if_range.date
+
+    if use_range:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f"bytes */{size}"
+            return response
+        start, stop = bounds
+        response.status_code = 206
+        response.content_range = byte_range.make_content_range(size)
+
+    handle = open(path, 'rb')
+    handle.seek(start)
+    response.response = _file_body(request.environ, handle, stop - start)
+    response.direct_passthrough = True
+    response.content_length = stop - start
+    return response
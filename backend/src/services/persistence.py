@@ -0,0 +1,500 @@
+# Persistência dos armazenamentos em memória.
+# Cada alteração vira um registro (loja, chave, valor) num log de escrita
+# antecipada (WAL) com group commit: requisições simultâneas compartilham o
+# mesmo fsync. Snapshots periódicos compactam o estado e, na inicialização,
+# o snapshot é lido via mmap e apenas o final do WAL é reaplicado.
+import atexit
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_GROUP_COMMIT_MS = 2
+DEFAULT_SNAPSHOT_INTERVAL = 300
+DEFAULT_SNAPSHOT_RECORDS = 50000
+
+SNAPSHOT_FILE = 'snapshot.bin'
+SNAPSHOT_MAGIC = b'PRYSNAP1'
+WAL_PREFIX = 'wal-'
+WAL_SUFFIX = '.log'
+
+# Quadro do WAL: tamanho e CRC32 do payload JSON
+FRAME_HEADER = struct.Struct('<II')
+# Cabeçalho do snapshot: último registro incluído e número de seções
+SNAPSHOT_HEADER = struct.Struct('<QI')
+# Entrada da tabela de seções: tamanho do nome, offset e tamanho da seção
+SECTION_ENTRY = struct.Struct('<HQQ')
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _segment_name(start_seq):
+    return f"{WAL_PREFIX}{start_seq:020d}{WAL_SUFFIX}"
+
+
+def _segment_start(filename):
+    return int(filename[len(WAL_PREFIX):-len(WAL_SUFFIX)])
+
+
+def _fsync_directory(directory):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    def __init__(self, directory, next_seq=1, group_commit_ms=DEFAULT_GROUP_COMMIT_MS):
+        self._directory = directory
+        self._window = group_commit_ms / 1000
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        # (seq, quadro) ainda não gravados
+        self._buffer = []
+        self._appended = next_seq - 1
+        self._synced = next_seq - 1
+        self._rotate_at = None
+        self._rotated = next_seq - 1
+        self._closed = False
+        self._error = None
+        self.batches = 0
+
+        self._file = open(os.path.join(directory, _segment_name(next_seq)), 'ab')
+        _fsync_directory(directory)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='wal-writer')
+        self._thread.start()
+
+    @property
+    def last_seq(self):
+        with self._lock:
+            return self._appended
+
+    def append(self, payload, wait=True):
+        # payload é serializado com o número de sequência; com wait=True
+        # retorna somente depois do fsync do lote que contém o registro
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WAL encerrado")
+            self._appended += 1
+            seq = self._appended
+            data = _encode([seq] + payload)
+            self._buffer.append((seq, FRAME_HEADER.pack(len(data), zlib.crc32(data)) + data))
+            self._wakeup.notify()
+            if wait:
+                while self._synced < seq and self._error is None:
+                    self._durable.wait()
+                if self._error is not None:
+                    raise self._error
+        return seq
+
+    def rotate(self):
+        # Inicia um novo segmento; registros até o número retornado ficam
+        # nos segmentos anteriores
+        with self._lock:
+            cut = self._appended
+            self._rotate_at = cut
+            self._wakeup.notify()
+            while self._rotated < cut and self._error is None:
+                self._durable.wait()
+            if self._error is not None:
+                raise self._error
+        return cut
+
+    def sync(self):
+        # Aguarda o fsync de tudo que já foi anexado
+        with self._lock:
+            while self._synced < self._appended and self._error is None:
+                self._durable.wait()
+            if self._error is not None:
+                raise self._error
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._buffer and self._rotate_at is None and not self._closed:
+                    self._wakeup.wait()
+                if not self._buffer and self._rotate_at is None:
+                    break
+            # Janela de group commit: reúne mais registros no mesmo fsync
+            if self._window:
+                time.sleep(self._window)
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                rotate_at, self._rotate_at = self._rotate_at, None
+
+            try:
+                self._write(batch, rotate_at)
+            except OSError as error:
+                with self._lock:
+                    self._error = error
+                    self._durable.notify_all()
+                return
+
+            with self._lock:
+                if batch:
+                    self._synced = batch[-1][0]
+                if rotate_at is not None:
+                    self._rotated = rotate_at
+                self.batches += 1
+                self._durable.notify_all()
+        self._file.close()
+
+    def _write(self, batch, rotate_at):
+        if rotate_at is None:
+            self._file.write(b''.join(frame for _, frame in batch))
+        else:
+            self._file.write(b''.join(frame for seq, frame in batch if seq <= rotate_at))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = open(os.path.join(self._directory, _segment_name(rotate_at + 1)), 'ab')
+            _fsync_directory(self._directory)
+            self._file.write(b''.join(frame for seq, frame in batch if seq > rotate_at))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def read_segment(path):
+    # Lê os registros de um segmento, parando no primeiro quadro incompleto
+    # ou corrompido (escrita interrompida); o restante é descartado
+    records = []
+    with open(path, 'rb') as file:
+        data = file.read()
+    offset = 0
+    while offset + FRAME_HEADER.size <= len(data):
+        length, checksum = FRAME_HEADER.unpack_from(data, offset)
+        start = offset + FRAME_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append(json.loads(payload))
+        offset = start + length
+    if offset < len(data):
+        with open(path, 'r+b') as file:
+            file.truncate(offset)
+    return records
+
+
+def write_snapshot(path, last_seq, sections):
+    # sections: {nome: bytes JSON}; gravado em arquivo temporário e
+    # renomeado atomicamente depois do fsync
+    names = sorted(sections)
+    table_size = sum(SECTION_ENTRY.size + len(name.encode('utf-8')) for name in names)
+    offset = len(SNAPSHOT_MAGIC) + SNAPSHOT_HEADER.size + table_size
+
+    header = [SNAPSHOT_MAGIC, SNAPSHOT_HEADER.pack(last_seq, len(names))]
+    for name in names:
+        encoded = name.encode('utf-8')
+        header.append(SECTION_ENTRY.pack(len(encoded), offset, len(sections[name])) + encoded)
+        offset += len(sections[name])
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(b''.join(header))
+        for name in names:
+            file.write(sections[name])
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+class SnapshotReader:
+    # Mapeia o snapshot em memória e decodifica cada seção sob demanda
+    def __init__(self, path):
+        self.last_seq = 0
+        self._sections = {}
+        self._file = None
+        self._map = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"Snapshot inválido: {path}")
+
+        position = len(SNAPSHOT_MAGIC)
+        self.last_seq, count = SNAPSHOT_HEADER.unpack_from(self._map, position)
+        position += SNAPSHOT_HEADER.size
+        for _ in range(count):
+            name_length, offset, length = SECTION_ENTRY.unpack_from(self._map, position)
+            position += SECTION_ENTRY.size
+            name = self._map[position:position + name_length].decode('utf-8')
+            position += name_length
+            self._sections[name] = (offset, length)
+
+    def __contains__(self, name):
+        return name in self._sections
+
+    def section(self, name):
+        offset, length = self._sections[name]
+        return json.loads(self._map[offset:offset + length])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = self._file = None
+
+
+class PersistenceEngine:
+    # Listagens continuam servidas pelas estruturas em memória
+    sql = False
+
+    def __init__(self, directory=None, group_commit_ms=DEFAULT_GROUP_COMMIT_MS,
+                 snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL,
+                 snapshot_records=DEFAULT_SNAPSHOT_RECORDS):
+        # Sem diretório a persistência fica desativada: load devolve os
+        # dados iniciais e put/delete não fazem nada
+        self.directory = directory
+        self._group_commit_ms = group_commit_ms
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_records = snapshot_records
+        # loja -> {chave: cópia do registro na última gravação}
+        self._stores = {}
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_due = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self._snapshot_seq = 0
+        self._wal = None
+        self._recovered = None
+        self.recovery_seconds = 0.0
+        self.snapshots = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    @property
+    def single_writer(self):
+        # O WAL local aceita um único processo: sem vários workers nem reloader
+        return self.enabled
+
+    def _lock_directory(self):
+        # Um único processo pode escrever no WAL
+        self._lock_file = open(os.path.join(self.directory, 'LOCK'), 'a')
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            raise RuntimeError(
+                f"Diretório de persistência em uso por outro processo: {self.directory}. "
+                "O WAL aceita um único processo (um worker, sem reloader); "
+                "para vários processos use DATABASE_URL"
+            )
+
+    def _segments(self):
+        return sorted(
+            (_segment_start(filename), filename)
+            for filename in os.listdir(self.directory)
+            if filename.startswith(WAL_PREFIX) and filename.endswith(WAL_SUFFIX)
+        )
+
+    def _recover(self):
+        # Snapshot via mmap + registros do WAL posteriores a ele. O diretório
+        # só é travado aqui, no primeiro uso, e não ao importar o módulo
+        started = time.perf_counter()
+        self._lock_directory()
+        snapshot = SnapshotReader(os.path.join(self.directory, SNAPSHOT_FILE))
+        self._snapshot_seq = last_seq = snapshot.last_seq
+
+        tail = {}
+        for _, filename in self._segments():
+            for record in read_segment(os.path.join(self.directory, filename)):
+                seq, name, key, value = record
+                if seq <= snapshot.last_seq:
+                    continue
+                tail.setdefault(name, {})[key] = value
+                last_seq = max(last_seq, seq)
+
+        self._recovered = (snapshot, tail)
+        self._wal = WriteAheadLog(self.directory, last_seq + 1, self._group_commit_ms)
+        self.recovery_seconds = time.perf_counter() - started
+
+    def _ensure_recovered(self):
+        if self._recovered is None:
+            self._recover()
+
+    def load(self, name, records):
+        # Estado recuperado da loja; records são os dados iniciais usados
+        # quando ainda não há nada persistido
+        records = dict(records)
+        if not self.enabled:
+            return records
+
+        with self._lock:
+            self._ensure_recovered()
+            snapshot, tail = self._recovered
+            if name in snapshot:
+                records = dict(snapshot.section(name))
+            for key, value in tail.pop(name, {}).items():
+                if value is None:
+                    records.pop(key, None)
+                else:
+                    records[key] = value
+            self._stores[name] = {key: dict(value) for key, value in records.items()}
+        return records
+
+    def load_list(self, name, items, key='id'):
+        # Variante de load para lojas guardadas como lista de registros
+        return list(self.load(name, {item[key]: item for item in items}).values())
+
+    def put(self, name, key, record, wait=True):
+        if not self.enabled:
+            return
+        self._append(name, key, record, wait)
+
+    def delete(self, name, key, wait=True):
+        if not self.enabled:
+            return
+        self._append(name, key, None, wait)
+
+    def _append(self, name, key, record, wait):
+        # Cópia rasa: o snapshot serializa em outra thread e não pode ver o
+        # registro da loja sendo alterado no meio
+        if record is not None:
+            record = dict(record)
+        with self._lock:
+            self._ensure_recovered()
+            store = self._stores.setdefault(name, {})
+            if record is None:
+                store.pop(key, None)
+            else:
+                store[key] = record
+        seq = self._wal.append([name, key, record], wait=wait)
+        if seq - self._snapshot_seq >= self._snapshot_records:
+            self._snapshot_due.set()
+
+    def sync(self):
+        if self._wal is not None:
+            self._wal.sync()
+
+    def snapshot(self):
+        if not self.enabled or self._wal is None:
+            return None
+        with self._snapshot_lock:
+            # Cópia rasa sob lock; os registros guardados já são cópias e não
+            # mudam depois de gravados
+            with self._lock:
+                cut = self._wal.rotate()
+                stores = {name: dict(store) for name, store in self._stores.items()}
+            if cut == self._snapshot_seq:
+                return cut
+
+            write_snapshot(
+                os.path.join(self.directory, SNAPSHOT_FILE), cut,
+                {name: _encode(store) for name, store in stores.items()}
+            )
+            self._snapshot_seq = cut
+            self.snapshots += 1
+
+            # Segmentos cujos registros já estão todos no snapshot
+            segments = self._segments()
+            for (_, filename), (next_start, _) in zip(segments, segments[1:]):
+                if next_start <= cut + 1:
+                    os.remove(os.path.join(self.directory, filename))
+        return cut
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._snapshot_due.wait(self._snapshot_interval)
+            self._snapshot_due.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.snapshot()
+            except Exception:
+                # Mantém o WAL; a próxima tentativa refaz o snapshot
+                pass
+
+    def start(self):
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='persistence-snapshots')
+        self._thread.start()
+        # Registrado antes dos contadores, roda depois do flush final deles
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self._snapshot_due.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._wal is not None:
+            self.snapshot()
+        self.close()
+
+    def close(self):
+        # Encerra o WAL e libera o diretório sem gerar snapshot
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+            self._recovered[0].close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "last_seq": self._wal.last_seq if self._wal else 0,
+            "snapshot_seq": self._snapshot_seq,
+            "snapshots": self.snapshots,
+            "fsync_batches": self._wal.batches if self._wal else 0,
+            "recovery_seconds": round(self.recovery_seconds, 6)
+        }
+
+
+def create_persistence():
+    # DATABASE_URL ativa o modo SQL; senão PERSISTENCE_DIR ativa o WAL local
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        from src.services.sql_store import (DEFAULT_MAX_OVERFLOW, DEFAULT_POOL_RECYCLE,
+                                            DEFAULT_POOL_SIZE, SqlStore)
+        return SqlStore(
+            database_url,
+            pool_size=int(os.environ.get('DB_POOL_SIZE', DEFAULT_POOL_SIZE)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW)),
+            pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE))
+        )
+    return PersistenceEngine(
+        os.environ.get('PERSISTENCE_DIR'),
+        group_commit_ms=float(os.environ.get('PERSISTENCE_GROUP_COMMIT_MS', DEFAULT_GROUP_COMMIT_MS)),
+        snapshot_interval=float(os.environ.get('PERSISTENCE_SNAPSHOT_INTERVAL', DEFAULT_SNAPSHOT_INTERVAL)),
+        snapshot_records=int(os.environ.get('PERSISTENCE_SNAPSHOT_RECORDS', DEFAULT_SNAPSHOT_RECORDS))
+    )
+
+
+# Instância compartilhada pelas rotas
+persistence = create_persistence()
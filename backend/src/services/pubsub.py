@@ -0,0 +1,15 @@
+# Opções de pub/sub para rodar o Socket.IO em várias instâncias.
+# Os broadcasts para salas passam pela fila configurada: redis://, amqp://,
+# kafka:// e zmq:// usam os gerenciadores do python-socketio.
+
+
+def socketio_options(message_queue=None, channel='prysmsclips', transports=None):
+    # Argumentos extras para SocketIO(app, ...) conforme a configuração
+    options = {}
+    if message_queue:
+        options['message_queue'] = message_queue
+        options['channel'] = channel
+    if transports:
+        options['transports'] = [transport.strip() for transport in transports.split(',')
+                                 if transport.strip()]
+    return options
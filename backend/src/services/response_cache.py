@@ -0,0 +1,144 @@
+# Cache de respostas serializadas das rotas de leitura.
+# A chave é caminho + query string + Accept-Encoding (e o usuário, nas rotas
+# personalizadas), já que a resposta guardada é a versão comprimida;
+# cada rota tem seu TTL e marcadores (tags), e as rotas de escrita invalidam
+# apenas as entradas dos marcadores que alteram. Contadores de acerto/falha
+# ficam disponíveis por rota.
+import os
+import threading
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+from src.services.ttl_cache import TTLCache
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL = 5
+# Cabeçalhos que pertencem à requisição original e não são reaproveitados
+_SKIPPED_HEADERS = {'set-cookie', 'content-length', 'date'}
+
+
+class _Rule:
+    __slots__ = ('ttl', 'tags', 'per_user')
+
+    def __init__(self, ttl, tags, per_user):
+        self.ttl = ttl
+        self.tags = tags
+        self.per_user = per_user
+
+
+class ResponseCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, default_ttl=DEFAULT_TTL):
+        self._entries = TTLCache(max_size=max_entries, ttl=default_ttl)
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._rules = {}
+        # endpoint de escrita -> tags invalidadas após resposta 2xx
+        self._writers = {}
+        self._keys_by_tag = defaultdict(set)
+        # Geração por tag: respostas calculadas antes de uma invalidação
+        # não são armazenadas depois dela
+        self._generations = defaultdict(int)
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+
+    def cache(self, endpoint, ttl=None, tags=(), per_user=False):
+        self._rules[endpoint] = _Rule(self._default_ttl if ttl is None else ttl,
+                                      tuple(tags), per_user)
+
+    def invalidate_on(self, endpoint, *tags):
+        self._writers[endpoint] = tuple(tags)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def invalidate(self, *tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                self._generations[tag] += 1
+                keys.update(self._keys_by_tag.pop(tag, ()))
+        for key in keys:
+            self._entries.invalidate(key)
+
+    def _key(self, rule):
+        query = urlencode(sorted(request.args.items(multi=True)))
+        user = current_user.get_id() if rule.per_user and current_user.is_authenticated else None
+        return (request.path, query, request.headers.get('Accept-Encoding', ''), user)
+
+    def _before_request(self):
+        if request.method != 'GET':
+            return None
+        rule = self._rules.get(request.endpoint)
+        if rule is None:
+            return None
+
+        key = self._key(rule)
+        entry = self._entries.get(key)
+        counters = self._counters[request.endpoint]
+        if entry is None:
+            with self._lock:
+                counters["misses"] += 1
+                g.response_cache = (key, rule, [self._generations[tag] for tag in rule.tags])
+            return None
+
+        with self._lock:
+            counters["hits"] += 1
+        body, status, headers = entry
+        g.response_cache_hit = True
+        response = current_app.response_class(body, status=status, headers=headers)
+        response.headers['X-Cache'] = 'HIT'
+        return response.make_conditional(request)
+
+    def _after_request(self, response):
+        if getattr(g, 'response_cache_hit', False):
+            return response
+
+        tags = self._writers.get(request.endpoint)
+        if tags and 200 <= response.status_code < 300:
+            self.invalidate(*tags)
+
+        pending = getattr(g, 'response_cache', None)
+        if pending is None:
+            return response
+        response.headers['X-Cache'] = 'MISS'
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+            return response
+
+        key, rule, generations = pending
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in _SKIPPED_HEADERS and name != 'X-Cache']
+        entry = (response.get_data(), response.status_code, headers)
+        overflowing = []
+        with self._lock:
+            if generations != [self._generations[tag] for tag in rule.tags]:
+                return response
+            for tag in rule.tags:
+                keys = self._keys_by_tag[tag]
+                keys.add(key)
+                # Chaves já removidas pelo LRU se acumulam no conjunto da tag
+                if len(keys) > 2 * self._max_entries:
+                    overflowing.append(tag)
+        if overflowing:
+            self.invalidate(*overflowing)
+            return response
+        self._entries.set(key, entry, ttl=rule.ttl)
+        return response
+
+    def stats(self):
+        with self._lock:
+            endpoints = {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+        stats = self._entries.stats()
+        stats["endpoints"] = endpoints
+        return stats
+
+
+# Instância compartilhada: as regras são registradas em create_app, e os sinks
+# dos contadores (fora do ciclo da requisição) também invalidam por ela
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+    default_ttl=float(os.environ.get('RESPONSE_CACHE_TTL', DEFAULT_TTL))
+)
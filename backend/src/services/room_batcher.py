@@ -0,0 +1,41 @@
+# Agrupa mensagens de alta frequência por sala em ticks curtos.
+# Em vez de um emit por tecla, cada sala recebe um único frame por tick
+# com todos os itens acumulados no período.
+import threading
+
+
+class RoomBatcher:
+    def __init__(self, socketio, event, tick_ms=33):
+        self._socketio = socketio
+        self._event = event
+        self._tick = tick_ms / 1000.0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def push(self, room, item):
+        with self._lock:
+            items = self._pending.get(room)
+            if items is None:
+                self._pending[room] = [item]
+                schedule = True
+            else:
+                items.append(item)
+                schedule = False
+
+        # Apenas o primeiro item do tick agenda o envio da sala
+        if schedule:
+            self._socketio.start_background_task(self._flush_later, room)
+
+    def _flush_later(self, room):
+        self._socketio.sleep(self._tick)
+        self.flush(room)
+
+    def flush(self, room):
+        with self._lock:
+            items = self._pending.pop(room, None)
+        if items:
+            self._socketio.emit(self._event, {'inputs': items}, room=room)
+
+    def discard(self, room):
+        with self._lock:
+            self._pending.pop(room, None)
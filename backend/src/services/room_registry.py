@@ -0,0 +1,222 @@
+# Registro de salas do jogo da bomba com busca por id e índices por
+# categoria e status. A ocupação é controlada por sala com lock próprio:
+# o REST reserva uma vaga e a conexão Socket.IO a confirma; vagas não
+# confirmadas expiram (varridas também nas leituras) e desconexões liberam
+# a vaga.
+import threading
+import time
+
+RESERVATION_TTL = 30
+INDEXED_FIELDS = ('category', 'status')
+
+
+class _Seats:
+    __slots__ = ('lock', 'anonymous', 'reserved', 'members')
+
+    def __init__(self, anonymous=0):
+        self.lock = threading.Lock()
+        # Ocupação pré-existente sem usuário associado (dados de exemplo)
+        self.anonymous = anonymous
+        # usuário -> expiração da reserva
+        self.reserved = {}
+        # usuário -> conjunto de sids conectados
+        self.members = {}
+
+    def count(self):
+        return self.anonymous + len(self.reserved) + len(self.members)
+
+    def purge(self, now):
+        expired = [user for user, expires_at in self.reserved.items() if expires_at <= now]
+        for user in expired:
+            del self.reserved[user]
+
+
+class RoomRegistry:
+    def __init__(self, rooms=None, reservation_ttl=RESERVATION_TTL):
+        self._rooms = {}
+        self._seats = {}
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._open = {}
+        self._sids = {}
+        # Salas com reservas pendentes, varridas por sweep()
+        self._reserved_rooms = set()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._reservation_ttl = reservation_ttl
+        self._listeners = []
+
+        for room in rooms or []:
+            self._insert(dict(room), room.get('players', 0))
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __contains__(self, room_id):
+        return room_id in self._rooms
+
+    def get(self, room_id):
+        room = self._rooms.get(room_id)
+        if room is not None and room_id in self._reserved_rooms:
+            self._purge(room_id, time.monotonic())
+        return room
+
+    def next_id(self):
+        return f"room{self._sequence + 1}"
+
+    def subscribe(self, listener):
+        # Chamado com a sala após criação ou mudança de status
+        self._listeners.append(listener)
+
+    def _notify(self, room):
+        for listener in self._listeners:
+            listener(room)
+
+    def _insert(self, room, anonymous=0):
+        room_id = room['id']
+        room['players'] = anonymous
+        self._rooms[room_id] = room
+        self._seats[room_id] = _Seats(anonymous)
+        for field in INDEXED_FIELDS:
+            self._indexes[field].setdefault(room.get(field), {})[room_id] = room
+        self._refresh_open(room)
+
+        suffix = room_id[4:] if room_id.startswith('room') else ''
+        if suffix.isdigit():
+            self._sequence = max(self._sequence, int(suffix))
+        else:
+            self._sequence += 1
+
+    def _refresh_open(self, room):
+        if room['players'] < room['max_players']:
+            self._open[room['id']] = room
+        else:
+            self._open.pop(room['id'], None)
+
+    def _sync_count(self, room, seats):
+        room['players'] = seats.count()
+        with self._lock:
+            self._refresh_open(room)
+            if seats.reserved:
+                self._reserved_rooms.add(room['id'])
+            else:
+                self._reserved_rooms.discard(room['id'])
+
+    def _purge(self, room_id, now):
+        room = self._rooms[room_id]
+        seats = self._seats[room_id]
+        with seats.lock:
+            seats.purge(now)
+            self._sync_count(room, seats)
+
+    def sweep(self):
+        # Libera as reservas expiradas que nenhum reserve/attach recolheu
+        now = time.monotonic()
+        with self._lock:
+            room_ids = list(self._reserved_rooms)
+        for room_id in room_ids:
+            self._purge(room_id, now)
+
+    def create(self, name, category, max_players, owner_id):
+        with self._lock:
+            room_id = self.next_id()
+            room = {
+                "id": room_id,
+                "name": name,
+                "category": category,
+                "players": 0,
+                "max_players": max_players,
+                "status": "Aguardando"
+            }
+            self._insert(room)
+        self._notify(room)
+        self.reserve(room_id, owner_id)
+        return room
+
+    def set_status(self, room_id, status):
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None or room['status'] == status:
+                return
+            self._indexes['status'].get(room['status'], {}).pop(room_id, None)
+            room['status'] = status
+            self._indexes['status'].setdefault(status, {})[room_id] = room
+        self._notify(room)
+
+    def reserve(self, room_id, user_id):
+        # Retorna (sala, erro); erro é None, 'not_found' ou 'full'
+        room = self._rooms.get(room_id)
+        if room is None:
+            return None, 'not_found'
+        seats = self._seats[room_id]
+        with seats.lock:
+            seats.purge(time.monotonic())
+            if user_id in seats.members:
+                return room, None
+            if user_id not in seats.reserved and seats.count() >= room['max_players']:
+                self._sync_count(room, seats)
+                return room, 'full'
+            seats.reserved[user_id] = time.monotonic() + self._reservation_ttl
+            self._sync_count(room, seats)
+        return room, None
+
+    def attach(self, room_id, user_id, sid):
+        # Confirma a vaga com a conexão do socket (reservando se necessário)
+        room = self._rooms.get(room_id)
+        if room is None:
+            return None, 'not_found'
+        seats = self._seats[room_id]
+        with seats.lock:
+            seats.purge(time.monotonic())
+            if user_id not in seats.members and user_id not in seats.reserved \
+                    and seats.count() >= room['max_players']:
+                return room, 'full'
+            seats.reserved.pop(user_id, None)
+            seats.members.setdefault(user_id, set()).add(sid)
+            self._sync_count(room, seats)
+        with self._lock:
+            self._sids.setdefault(sid, {})[room_id] = user_id
+        return room, None
+
+    def detach(self, room_id, sid):
+        with self._lock:
+            user_id = self._sids.get(sid, {}).pop(room_id, None)
+            if sid in self._sids and not self._sids[sid]:
+                del self._sids[sid]
+        if user_id is None or room_id not in self._rooms:
+            return
+        room = self._rooms[room_id]
+        seats = self._seats[room_id]
+        with seats.lock:
+            sids = seats.members.get(user_id)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del seats.members[user_id]
+            self._sync_count(room, seats)
+
+    def detach_all(self, sid):
+        with self._lock:
+            room_ids = list(self._sids.get(sid, {}))
+        for room_id in room_ids:
+            self.detach(room_id, sid)
+        return room_ids
+
+    def filter(self, category=None, status=None, open_only=False):
+        self.sweep()
+        buckets = []
+        with self._lock:
+            if category is not None:
+                buckets.append(self._indexes['category'].get(category, {}))
+            if status is not None:
+                buckets.append(self._indexes['status'].get(status, {}))
+            if open_only:
+                buckets.append(self._open)
+            if not buckets:
+                return list(self._rooms.values())
+
+            buckets.sort(key=len)
+            smallest, others = buckets[0], buckets[1:]
+            return [
+                room for room_id, room in smallest.items()
+                if all(room_id in bucket for bucket in others)
+            ]
@@ -0,0 +1,123 @@
+# Índice invertido em memória para busca de clipes.
+# Tokens sem acento e em minúsculas ("Vitória épica" -> "vitoria", "epica"),
+# prefixo no último termo para autocomplete e ranking BM25 combinado com a
+# popularidade do clipe (curtidas/visualizações).
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+TOKEN_PATTERN = re.compile(r'\w+')
+# Peso de cada campo na frequência do termo
+FIELD_WEIGHTS = {
+    'title': 1.0,
+    'game': 0.6,
+    'username': 0.6,
+}
+MAX_PREFIX_EXPANSIONS = 64
+
+
+def fold(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(fold(text))
+
+
+class SearchIndex:
+    def __init__(self, repository, k1=1.2, b=0.75, popularity_weight=0.5):
+        self._repository = repository
+        self._k1 = k1
+        self._b = b
+        self._popularity_weight = popularity_weight
+        # termo -> {clip_id: frequência ponderada}
+        self._postings = {}
+        self._terms = []
+        self._lengths = {}
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+
+        for clip in repository:
+            self.add(clip)
+        repository.subscribe(self.add)
+
+    def add(self, clip):
+        clip_id = clip['id']
+        # Campos de texto não mudam; incrementos de contadores são ignorados
+        if clip_id in self._lengths:
+            return
+
+        frequencies = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(clip.get(field)):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+
+        with self._lock:
+            for token, frequency in frequencies.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    insort(self._terms, token)
+                postings[clip_id] = frequency
+            length = sum(frequencies.values())
+            self._lengths[clip_id] = length
+            self._total_length += length
+
+    def _expand(self, prefix):
+        start = bisect_left(self._terms, prefix)
+        expansions = []
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def _popularity(self, clip):
+        return math.log10(1 + (clip.get('likes') or 0) + 0.1 * (clip.get('views') or 0))
+
+    def search(self, query, limit=20, prefix=True):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            count = len(self._lengths)
+            if not count:
+                return []
+            average_length = self._total_length / count
+
+            # Cada termo da consulta vira um grupo de termos do índice;
+            # o último pode ser prefixo (autocomplete)
+            groups = [[token] if token in self._postings else [] for token in tokens[:-1]]
+            last = tokens[-1]
+            groups.append(self._expand(last) if prefix else ([last] if last in self._postings else []))
+            if any(not group for group in groups):
+                return []
+
+            # Todos os termos precisam aparecer (AND), começando pelo grupo mais raro
+            group_docs = [set().union(*(self._postings[term] for term in group)) for group in groups]
+            group_docs.sort(key=len)
+            candidates = set.intersection(*group_docs)
+
+            scores = dict.fromkeys(candidates, 0.0)
+            for group in groups:
+                for term in group:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for clip_id in candidates:
+                        frequency = postings.get(clip_id)
+                        if not frequency:
+                            continue
+                        norm = self._k1 * (1 - self._b + self._b * self._lengths[clip_id] / average_length)
+                        scores[clip_id] += idf * frequency * (self._k1 + 1) / (frequency + norm)
+
+        results = []
+        for clip_id, score in scores.items():
+            clip = self._repository.get(clip_id)
+            if clip is not None:
+                results.append((score + self._popularity_weight * self._popularity(clip), clip))
+        results.sort(key=lambda item: (-item[0], item[1]['id']))
+        return [clip for _, clip in results[:limit]]
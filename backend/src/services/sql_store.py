@@ -0,0 +1,393 @@
+# Modo de repositório em banco SQL (SQLite local, MySQL/PostgreSQL em produção).
+# Mesma interface do motor de persistência (load/put/delete/sync), com
+# tabelas próprias por loja, e consultas de listagem feitas direto no banco:
+# paginação por chave sobre índices de cobertura e nomes de usuário
+# carregados em lote (selectinload), sem uma consulta por clipe.
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import (JSON, Column, ForeignKey, Index, Integer, String, and_,
+                        create_engine, event, or_, select)
+from sqlalchemy.orm import declarative_base, relationship, selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.services.clip_store import SORT_ORDERS, decode_cursor, encode_cursor, parse_timestamp
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_OVERFLOW = 20
+DEFAULT_POOL_TIMEOUT = 10
+DEFAULT_POOL_RECYCLE = 1800
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'users'
+
+    id = Column(String(64), primary_key=True)
+    username = Column(String(64), nullable=False, unique=True)
+    password_hash = Column(String(255), nullable=False)
+    prysms = Column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def from_record(cls, key, record):
+        return cls(id=key, username=record['username'],
+                   password_hash=record['password_hash'], prysms=record['prysms'])
+
+    def to_record(self):
+        return {"username": self.username, "password_hash": self.password_hash,
+                "prysms": self.prysms}
+
+
+class Clip(Base):
+    __tablename__ = 'clips'
+
+    id = Column(String(64), primary_key=True)
+    user_id = Column(String(64), ForeignKey('users.id'), nullable=False)
+    title = Column(String(255), nullable=False)
+    game = Column(String(128))
+    category = Column(String(128))
+    url = Column(String(512))
+    thumbnail = Column(String(512))
+    views = Column(Integer, nullable=False, default=0)
+    likes = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    created_at = Column(String(32), nullable=False)
+    # Campos adicionais (status e metadados de mídia)
+    extra = Column(JSON, nullable=False, default=dict)
+
+    # lazy='raise': o usuário precisa ser carregado junto, nunca um por clipe
+    user = relationship(User, lazy='raise')
+
+    COLUMNS = ('title', 'user_id', 'game', 'category', 'url', 'thumbnail',
+               'views', 'likes', 'comments', 'created_at')
+
+    @classmethod
+    def from_record(cls, key, record):
+        extra = {field: value for field, value in record.items()
+                 if field not in cls.COLUMNS and field not in ('id', 'username')}
+        return cls(id=key, extra=extra, **{field: record.get(field) for field in cls.COLUMNS})
+
+    def to_record(self):
+        record = {"id": self.id, "username": self.user.username if self.user else None}
+        record.update((field, getattr(self, field)) for field in self.COLUMNS)
+        record.update(self.extra or {})
+        return record
+
+
+# Índices de cobertura para o feed: filtro + ordenação + desempate
+Index('ix_clips_created', Clip.created_at.desc(), Clip.id)
+Index('ix_clips_category_created', Clip.category, Clip.created_at.desc(), Clip.id)
+Index('ix_clips_game_created', Clip.game, Clip.created_at.desc(), Clip.id)
+Index('ix_clips_likes', Clip.likes.desc(), Clip.id)
+Index('ix_clips_views', Clip.views.desc(), Clip.id)
+# Jogadores com clipes em cada jogo (ranking por jogo)
+Index('ix_clips_game_user', Clip.game, Clip.user_id)
+
+
+class Loadout(Base):
+    __tablename__ = 'loadouts'
+
+    id = Column(String(64), primary_key=True)
+    user_id = Column(String(64), ForeignKey('users.id'), nullable=False, index=True)
+    weapon_id = Column(String(64), nullable=False)
+    skin_id = Column(String(64), nullable=False)
+    stickers = Column(JSON, nullable=False, default=list)
+    color = Column(String(16))
+    votes = Column(Integer, nullable=False, default=0)
+    created_at = Column(String(32), nullable=False)
+
+    user = relationship(User, lazy='raise')
+
+    COLUMNS = ('user_id', 'weapon_id', 'skin_id', 'stickers', 'color', 'votes', 'created_at')
+
+    @classmethod
+    def from_record(cls, key, record):
+        return cls(id=key, **{field: record.get(field) for field in cls.COLUMNS})
+
+    def to_record(self):
+        record = {"id": self.id, "username": self.user.username if self.user else None}
+        record.update((field, getattr(self, field)) for field in self.COLUMNS)
+        return record
+
+
+class Player(Base):
+    __tablename__ = 'players'
+
+    id = Column(String(64), primary_key=True)
+    username = Column(String(64), nullable=False)
+    followers = Column(Integer, nullable=False, default=0)
+    clips = Column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def from_record(cls, key, record):
+        return cls(id=key, username=record['username'],
+                   followers=record['followers'], clips=record['clips'])
+
+    def to_record(self):
+        return {"id": self.id, "username": self.username,
+                "followers": self.followers, "clips": self.clips}
+
+
+# Mesma ordem do Leaderboard: seguidores, clipes, id
+Index('ix_players_ranking', Player.followers.desc(), Player.clips.desc(), Player.id)
+
+
+class Follow(Base):
+    __tablename__ = 'follows'
+
+    follower_id = Column(String(64), primary_key=True)
+    followee_id = Column(String(64), primary_key=True, index=True)
+
+    @classmethod
+    def from_record(cls, key, record):
+        return cls(follower_id=record['follower'], followee_id=record['followee'])
+
+    @property
+    def key(self):
+        return f"{self.follower_id}:{self.followee_id}"
+
+    def to_record(self):
+        return {"follower": self.follower_id, "followee": self.followee_id}
+
+
+class Record(Base):
+    # Lojas sem tabela própria (salas) guardadas como documento JSON
+    __tablename__ = 'records'
+
+    store = Column(String(64), primary_key=True)
+    key = Column(String(128), primary_key=True)
+    data = Column(JSON, nullable=False)
+
+
+MODELS = {
+    'users': User,
+    'clips': Clip,
+    'loadouts': Loadout,
+    'players': Player,
+    'follows': Follow,
+}
+
+
+def _configure_sqlite(engine):
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(connection, _):
+        cursor = connection.cursor()
+        # Leitores não bloqueiam o escritor; fsync apenas nos checkpoints
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.close()
+
+
+def create_database_engine(url, pool_size=DEFAULT_POOL_SIZE, max_overflow=DEFAULT_MAX_OVERFLOW,
+                           pool_timeout=DEFAULT_POOL_TIMEOUT, pool_recycle=DEFAULT_POOL_RECYCLE):
+    if url.startswith('sqlite'):
+        options = {"connect_args": {"check_same_thread": False}}
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            # Banco em memória: uma única conexão compartilhada
+            options["poolclass"] = StaticPool
+        else:
+            options.update(pool_size=pool_size, max_overflow=max_overflow,
+                           pool_timeout=pool_timeout)
+        engine = create_engine(url, **options)
+        _configure_sqlite(engine)
+        return engine
+
+    return create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        # Conexões recicladas antes do wait_timeout do servidor e testadas na retirada
+        pool_recycle=pool_recycle,
+        pool_pre_ping=True
+    )
+
+
+class SqlStore:
+    # Indica às rotas que as listagens podem ser consultadas no banco
+    sql = True
+    enabled = True
+    # Vários processos podem compartilhar o banco
+    single_writer = False
+
+    def __init__(self, url, **pool_options):
+        self.engine = create_database_engine(url, **pool_options)
+        self._sessions = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Serializa os syncs: um lote só é retirado depois que o anterior
+        # foi gravado, então versões antigas nunca sobrescrevem as novas
+        self._commit_lock = threading.Lock()
+        Base.metadata.create_all(self.engine)
+
+    # Interface do motor de persistência
+
+    def load(self, name, records):
+        records = dict(records)
+        with self._sessions() as session:
+            stored = self._load(session, name)
+            if stored:
+                return stored
+            # Primeira execução: grava os dados iniciais
+            for key, record in records.items():
+                session.merge(self._to_row(name, key, record))
+            session.commit()
+        return records
+
+    def load_list(self, name, items, key='id'):
+        return list(self.load(name, {item[key]: item for item in items}).values())
+
+    def put(self, name, key, record, wait=True):
+        # Cópia rasa: o registro da loja pode mudar antes do sync
+        record = dict(record) if record is not None else None
+        with self._lock:
+            self._pending[(name, key)] = record
+        if wait:
+            self.sync()
+
+    def delete(self, name, key, wait=True):
+        self.put(name, key, None, wait)
+
+    def sync(self):
+        # Grava as alterações pendentes numa única transação
+        with self._commit_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                with self._sessions() as session:
+                    for (name, key), record in pending.items():
+                        if record is None:
+                            row = session.get(MODELS.get(name, Record), self._primary_key(name, key))
+                            if row is not None:
+                                session.delete(row)
+                        else:
+                            session.merge(self._to_row(name, key, record))
+                    session.commit()
+            except Exception:
+                # Devolve o lote sem sobrescrever gravações mais novas
+                with self._lock:
+                    for item, record in pending.items():
+                        self._pending.setdefault(item, record)
+                raise
+
+    def snapshot(self):
+        return None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.sync()
+        self.close()
+
+    def close(self):
+        self.engine.dispose()
+
+    def stats(self):
+        return {"enabled": True, "backend": self.engine.dialect.name,
+                "pool": self.engine.pool.status()}
+
+    def _primary_key(self, name, key):
+        if name == 'follows':
+            return tuple(key.split(':', 1))
+        if name in MODELS:
+            return key
+        return (name, key)
+
+    def _to_row(self, name, key, record):
+        model = MODELS.get(name)
+        if model is None:
+            return Record(store=name, key=key, data=record)
+        return model.from_record(key, record)
+
+    def _load(self, session, name):
+        model = MODELS.get(name)
+        if model is None:
+            rows = session.scalars(select(Record).where(Record.store == name).order_by(Record.key))
+            return {row.key: row.data for row in rows}
+        query = select(model)
+        if hasattr(model, 'user'):
+            query = query.options(selectinload(model.user))
+        if hasattr(model, 'created_at'):
+            query = query.order_by(model.created_at, model.id)
+        rows = session.scalars(query)
+        if model is Follow:
+            return {row.key: row.to_record() for row in rows}
+        return {row.id: row.to_record() for row in rows}
+
+    # Consultas
+
+    def find_user(self, user_id=None, username=None):
+        with self._sessions() as session:
+            if user_id is not None:
+                user = session.get(User, user_id)
+            else:
+                user = session.scalar(select(User).where(User.username == username))
+            return (user.id, user.to_record()) if user else None
+
+    def clips(self, category=None, game=None):
+        query = select(Clip).options(selectinload(Clip.user)).order_by(Clip.created_at, Clip.id)
+        query = self._clip_filters(query, category, game)
+        with self._sessions() as session:
+            return [clip.to_record() for clip in session.scalars(query)]
+
+    def clip_page(self, order='newest', limit=20, cursor=None, category=None, game=None):
+        # Mesmo formato de cursor do ClipRepository: (-pontuação, id)
+        if order not in SORT_ORDERS:
+            raise ValueError(f"Ordenação inválida: {order}")
+        column = getattr(Clip, SORT_ORDERS[order])
+
+        # 1ª consulta: apenas ids e chave de ordenação, resolvida no índice
+        query = select(Clip.id, column).order_by(column.desc(), Clip.id).limit(limit + 1)
+        query = self._clip_filters(query, category, game)
+        if cursor:
+            score, clip_id = decode_cursor(cursor)
+            value = -score
+            if order == 'newest':
+                value = datetime.fromtimestamp(value, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            query = query.where(or_(column < value, and_(column == value, Clip.id > clip_id)))
+
+        with self._sessions() as session:
+            keys = session.execute(query).all()
+            page = keys[:limit]
+            # 2ª e 3ª consultas: clipes da página e seus usuários, em lote
+            rows = session.scalars(
+                select(Clip).options(selectinload(Clip.user))
+                .where(Clip.id.in_([clip_id for clip_id, _ in page]))
+            )
+            by_id = {clip.id: clip.to_record() for clip in rows}
+
+        clips = [by_id[clip_id] for clip_id, _ in page if clip_id in by_id]
+        if len(keys) <= limit:
+            return clips, None
+        last_id, last_value = page[-1]
+        score = parse_timestamp(last_value) if order == 'newest' else last_value
+        return clips, encode_cursor((-score, last_id))
+
+    def _clip_filters(self, query, category, game):
+        if category is not None:
+            query = query.where(Clip.category == category)
+        if game is not None:
+            query = query.where(Clip.game == game)
+        return query
+
+    def loadouts(self):
+        query = select(Loadout).options(selectinload(Loadout.user)).order_by(Loadout.created_at, Loadout.id)
+        with self._sessions() as session:
+            return [loadout.to_record() for loadout in session.scalars(query)]
+
+    def ranking(self, game=None, limit=None, offset=0):
+        # Lista de (jogador, posição) na ordem do Leaderboard
+        query = select(Player).order_by(Player.followers.desc(), Player.clips.desc(), Player.id)
+        if game is not None:
+            query = query.where(Player.id.in_(select(Clip.user_id).where(Clip.game == game)))
+        query = query.offset(offset).limit(limit)
+        with self._sessions() as session:
+            return [
+                (player.to_record(), position)
+                for position, player in enumerate(session.scalars(query), start=offset + 1)
+            ]
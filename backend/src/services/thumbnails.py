@@ -0,0 +1,132 @@
+# Derivados de thumbnails (tamanhos e formatos) gerados sob demanda.
+# Os arquivos ficam em um cache em disco endereçado por conteúdo, com
+# limite de tamanho e remoção LRU; pedidos simultâneos do mesmo derivado
+# esperam uma única renderização.
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Tamanhos usados pelo frontend
+THUMBNAIL_SIZES = {
+    'feed': (480, 270),
+    'profile': (320, 180),
+    'ranking': (160, 90),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+class ThumbnailCache:
+    def __init__(self, directory, max_bytes):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._source_digests = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        # Reconstrói o LRU a partir do disco, do menos para o mais recente
+        found = []
+        for root, _, files in os.walk(self._directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith('.tmp'):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                found.append((stat.st_atime, path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _source_digest(self, source_path):
+        # Hash do conteúdo da imagem original, memorizado por mtime/tamanho
+        stat = os.stat(source_path)
+        signature = (source_path, stat.st_mtime_ns, stat.st_size)
+        digest = self._source_digests.get(signature)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(source_path, 'rb') as source:
+                for block in iter(lambda: source.read(256 * 1024), b''):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+            self._source_digests[signature] = digest
+        return digest
+
+    def get(self, source_path, size_name, image_format):
+        # Caminho do derivado pronto, renderizando na primeira vez
+        width, height = THUMBNAIL_SIZES[size_name]
+        spec = f"{self._source_digest(source_path)}:{width}x{height}:{image_format}"
+        digest = hashlib.sha256(spec.encode('ascii')).hexdigest()
+        path = os.path.join(self._directory, digest[:2], f"{digest}.{image_format}")
+
+        with self._lock:
+            if path in self._entries and os.path.exists(path):
+                self._entries.move_to_end(path)
+                return path
+            future = self._inflight.get(path)
+            owner = future is None
+            if owner:
+                future = self._inflight[path] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            size = self._render(source_path, path, (width, height), image_format)
+            with self._lock:
+                # Entrada cujo arquivo sumiu do disco: o tamanho é substituído
+                self._total_bytes += size - self._entries.pop(path, 0)
+                self._entries[path] = size
+                self._evict()
+            future.set_result(path)
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(path, None)
+        return path
+
+    def _render(self, source_path, path, size, image_format):
+        from PIL import Image, ImageOps
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pil_format, options = FORMATS[image_format]
+        with Image.open(source_path) as image:
+            derivative = ImageOps.fit(image.convert('RGB'), size, Image.LANCZOS)
+
+        # Escrita atômica: o arquivo só aparece completo no cache
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                derivative.save(output, pil_format, **options)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return os.path.getsize(path)
+
+    def _evict(self):
+        # Chamado com o lock adquirido
+        while self._total_bytes > self._max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            if os.path.exists(path):
+                os.remove(path)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total_bytes,
+                    "max_bytes": self._max_bytes}
@@ -0,0 +1,87 @@
+# Feed de clipes em alta com pontuação que decai com o tempo.
+# A pontuação é log2(1 + engajamento) + created_at / meia-vida: como o
+# "decaimento" é igual para todos os clipes, a ordem relativa só muda quando
+# chega engajamento novo, e o índice ordenado é atualizado só nesses eventos.
+import math
+import threading
+
+from src.services.clip_store import SortedIndex, parse_timestamp
+
+DEFAULT_HALF_LIFE = 12 * 60 * 60
+DEFAULT_TOP_N = 50
+
+# Peso de cada tipo de engajamento
+WEIGHTS = {
+    'likes': 1.0,
+    'comments': 3.0,
+    'views': 0.05,
+}
+SCOPE_FIELDS = ('game', 'category')
+
+
+def trending_score(clip, half_life=DEFAULT_HALF_LIFE):
+    engagement = sum(weight * (clip.get(field) or 0) for field, weight in WEIGHTS.items())
+    return math.log2(1 + engagement) + parse_timestamp(clip.get('created_at')) / half_life
+
+
+class TrendingIndex:
+    def __init__(self, repository, half_life=DEFAULT_HALF_LIFE, top_n=DEFAULT_TOP_N):
+        self._repository = repository
+        self._half_life = half_life
+        self.top_n = top_n
+        self._keys = {}
+        # None para o feed geral ou (campo, valor) -> SortedIndex
+        self._indexes = {None: SortedIndex()}
+        self._top_cache = {}
+        self._lock = threading.Lock()
+
+        for clip in repository:
+            self.update(clip)
+        repository.subscribe(self.update)
+
+    def _scopes(self, clip):
+        yield None
+        for field in SCOPE_FIELDS:
+            yield (field, clip.get(field))
+        # Jogo + categoria juntos têm índice próprio, com o top N completo
+        yield (SCOPE_FIELDS, tuple(clip.get(field) for field in SCOPE_FIELDS))
+
+    def update(self, clip):
+        key = (-trending_score(clip, self._half_life), clip['id'])
+        with self._lock:
+            old_key = self._keys.get(clip['id'])
+            if old_key == key:
+                return
+            for scope in self._scopes(clip):
+                index = self._indexes.setdefault(scope, SortedIndex())
+                if old_key is not None:
+                    index.remove(old_key)
+                index.insert(key)
+                # Só os escopos do clipe perdem o top N em cache
+                self._top_cache.pop(scope, None)
+            self._keys[clip['id']] = key
+
+    def top(self, game=None, category=None, limit=None):
+        limit = min(limit or self.top_n, self.top_n)
+        if game is not None and category is not None:
+            scope = (SCOPE_FIELDS, (game, category))
+        elif game is not None:
+            scope = ('game', game)
+        elif category is not None:
+            scope = ('category', category)
+        else:
+            scope = None
+
+        with self._lock:
+            ids = self._top_cache.get(scope)
+            if ids is None:
+                index = self._indexes.get(scope)
+                ids = []
+                if index is not None:
+                    for key in index.iter_after():
+                        if len(ids) == self.top_n:
+                            break
+                        ids.append(key[1])
+                self._top_cache[scope] = ids
+
+        return [self._repository.get(clip_id) for clip_id in ids[:limit]]
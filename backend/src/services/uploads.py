@@ -0,0 +1,111 @@
+# Uploads de clipes em partes (retomáveis), gravados direto em disco.
+# Cada parte é lida do corpo da requisição em blocos pequenos, então o
+# vídeo nunca fica inteiro em memória.
+import os
+import secrets
+import threading
+import time
+
+CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024
+UPLOAD_TTL = 24 * 60 * 60
+ALLOWED_EXTENSIONS = ('mp4', 'webm', 'mov')
+
+
+class UploadOffsetError(ValueError):
+    def __init__(self, expected):
+        super().__init__(f"Offset esperado: {expected}")
+        self.expected = expected
+
+
+class UploadSession:
+    __slots__ = ('id', 'user_id', 'metadata', 'extension', 'total_size',
+                 'received', 'path', 'updated_at', 'lock')
+
+    def __init__(self, upload_id, user_id, metadata, extension, total_size, path):
+        self.id = upload_id
+        self.user_id = user_id
+        self.metadata = metadata
+        self.extension = extension
+        self.total_size = total_size
+        self.received = 0
+        self.path = path
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+    @property
+    def complete(self):
+        return self.received == self.total_size
+
+
+class UploadManager:
+    def __init__(self, max_size=MAX_UPLOAD_SIZE, ttl=UPLOAD_TTL):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._ttl = ttl
+
+    def start(self, user_id, metadata, total_size, filename, directory):
+        if not isinstance(total_size, int) or total_size <= 0:
+            raise ValueError("Tamanho do arquivo inválido")
+        if total_size > self._max_size:
+            raise ValueError("Arquivo muito grande")
+        extension = (filename or '').rsplit('.', 1)[-1].lower() if '.' in (filename or '') else 'mp4'
+        if extension not in ALLOWED_EXTENSIONS:
+            raise ValueError("Formato de vídeo não suportado")
+
+        self._purge_expired()
+        partial_dir = os.path.join(directory, '.partial')
+        os.makedirs(partial_dir, exist_ok=True)
+
+        upload_id = secrets.token_urlsafe(16)
+        path = os.path.join(partial_dir, f"{upload_id}.part")
+        open(path, 'wb').close()
+
+        session = UploadSession(upload_id, user_id, metadata, extension, total_size, path)
+        with self._lock:
+            self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id, user_id):
+        session = self._sessions.get(upload_id)
+        if session is None or session.user_id != user_id:
+            return None
+        return session
+
+    def write(self, session, offset, stream, length):
+        # Grava a parte a partir de offset; só aceita continuar de onde parou
+        with session.lock:
+            if offset != session.received:
+                raise UploadOffsetError(session.received)
+            if length is None or length < 0 or offset + length > session.total_size:
+                raise ValueError("Tamanho da parte inválido")
+
+            with open(session.path, 'r+b') as output:
+                output.seek(offset)
+                remaining = length
+                while remaining > 0:
+                    chunk = stream.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    output.write(chunk)
+                    remaining -= len(chunk)
+                    # Conexão interrompida: o que chegou continua valendo
+                    session.received += len(chunk)
+            session.updated_at = time.time()
+            return session.received
+
+    def finish(self, session, destination):
+        with self._lock:
+            self._sessions.pop(session.id, None)
+        os.replace(session.path, destination)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            expired = [session for session in self._sessions.values() if session.updated_at < cutoff]
+            for session in expired:
+                del self._sessions[session.id]
+        for session in expired:
+            if os.path.exists(session.path):
+                os.remove(session.path)
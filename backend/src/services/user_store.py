@@ -0,0 +1,186 @@
+# Armazenamento de usuários com senhas em hash e índice por nome de usuário.
+# Login e cadastro não dependem do número de usuários, e o custo de CPU
+# com hashing é limitado por um semáforo e contabilizado em estatísticas.
+# No worker eventlet o PBKDF2 roda no pool de threads nativas (tpool), para
+# não bloquear o hub e os sockets durante cada login.
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    from eventlet import patcher as eventlet_patcher, tpool
+except ImportError:
+    eventlet_patcher = tpool = None
+
+DEFAULT_HASH_ITERATIONS = 600000
+DEFAULT_MAX_CONCURRENT_HASHES = 4
+DEFAULT_SESSION_CACHE_SIZE = 1024
+DEFAULT_SESSION_CACHE_TTL = 300
+
+
+def _offload(function, *args):
+    # Com eventlet ativo, o hash sai do hub e roda numa thread nativa
+    if tpool is not None and eventlet_patcher.is_monkey_patched('thread'):
+        return tpool.execute(function, *args)
+    return function(*args)
+
+
+class UserStore:
+    def __init__(self, users=None, iterations=None,
+                 max_concurrent_hashes=DEFAULT_MAX_CONCURRENT_HASHES,
+                 cache_size=DEFAULT_SESSION_CACHE_SIZE,
+                 cache_ttl=DEFAULT_SESSION_CACHE_TTL):
+        self._users = {}
+        self._by_username = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+        self.iterations = iterations or int(
+            os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_HASH_ITERATIONS)
+        )
+        self._hash_slots = threading.BoundedSemaphore(max_concurrent_hashes)
+        self._hash_count = 0
+        self._hash_seconds = 0.0
+
+        # Cache de credenciais já verificadas: evita refazer o PBKDF2
+        # em logins repetidos dentro do TTL
+        self._cache_key = os.urandom(32)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self._cache_hits = 0
+
+        # Hash usado para equalizar o tempo quando o usuário não existe
+        self._dummy_hash = self._hash_password(os.urandom(16).hex())
+
+        for user_id, user_data in (users or {}).items():
+            self._insert(user_id, dict(user_data))
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def __getitem__(self, user_id):
+        return self._users[user_id]
+
+    def __len__(self):
+        return len(self._users)
+
+    def get(self, user_id):
+        return self._users.get(user_id)
+
+    def id_for_username(self, username):
+        return self._by_username.get(username)
+
+    def reserve_ids(self, user_ids):
+        # Ids já usados fora do store (ex.: jogadores do ranking) não são
+        # reatribuídos a novos cadastros
+        with self._lock:
+            for user_id in user_ids:
+                self._advance_sequence(user_id)
+
+    def _advance_sequence(self, user_id):
+        suffix = user_id[4:] if user_id.startswith('user') else ''
+        if suffix.isdigit():
+            self._sequence = max(self._sequence, int(suffix))
+
+    def _insert(self, user_id, user_data):
+        self._users[user_id] = user_data
+        self._by_username[user_data['username']] = user_id
+        self._advance_sequence(user_id)
+
+    def _hash_password(self, password):
+        with self._hash_slots:
+            started = time.perf_counter()
+            password_hash = _offload(
+                generate_password_hash, password, f'pbkdf2:sha256:{self.iterations}'
+            )
+            self._record_hash(time.perf_counter() - started)
+        return password_hash
+
+    def _check_password(self, password_hash, password):
+        with self._hash_slots:
+            started = time.perf_counter()
+            valid = _offload(check_password_hash, password_hash, password)
+            self._record_hash(time.perf_counter() - started)
+        return valid
+
+    def _record_hash(self, elapsed):
+        with self._lock:
+            self._hash_count += 1
+            self._hash_seconds += elapsed
+
+    def _credential_key(self, username, password):
+        message = f"{username}\0{password}".encode('utf-8')
+        return hmac.new(self._cache_key, message, hashlib.sha256).digest()
+
+    def create(self, username, password, prysms=100):
+        # O hash é calculado fora do lock para não serializar cadastros
+        password_hash = self._hash_password(password)
+        with self._lock:
+            if username in self._by_username:
+                return None
+            self._sequence += 1
+            user_id = f"user{self._sequence}"
+            self._insert(user_id, {
+                "username": username,
+                "password_hash": password_hash,
+                "prysms": prysms
+            })
+        return user_id
+
+    def authenticate(self, username, password):
+        user_id = self._by_username.get(username)
+        user_data = self._users.get(user_id) if user_id else None
+        cache_key = self._credential_key(username, password)
+
+        if user_data is not None:
+            with self._lock:
+                cached = self._cache.get(cache_key)
+                if cached and cached[0] == user_id and cached[1] == user_data['password_hash'] \
+                        and cached[2] > time.monotonic():
+                    self._cache.move_to_end(cache_key)
+                    self._cache_hits += 1
+                    return user_id
+                self._cache.pop(cache_key, None)
+
+        if user_data is None:
+            # Mesmo custo para usuários inexistentes
+            self._check_password(self._dummy_hash, password)
+            return None
+
+        if not self._check_password(user_data['password_hash'], password):
+            return None
+
+        with self._lock:
+            self._cache[cache_key] = (
+                user_id, user_data['password_hash'], time.monotonic() + self._cache_ttl
+            )
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return user_id
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "hash_iterations": self.iterations,
+                "hash_count": self._hash_count,
+                "hash_seconds": round(self._hash_seconds, 6),
+                "session_cache_size": len(self._cache),
+                "session_cache_hits": self._cache_hits
+            }
+
+
+class SessionUser(UserMixin):
+    # Usuário resolvido uma vez por requisição e exposto via current_user
+    def __init__(self, user_id, user_data):
+        self.id = user_id
+        self.username = user_data['username']
+        self.prysms = user_data['prysms']
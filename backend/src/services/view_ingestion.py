@@ -0,0 +1,90 @@
+# Ingestão de visualizações de clipes em lote.
+# Espectadores são deduplicados por clipe com HyperLogLog e as novas
+# visualizações únicas são incorporadas ao clipe periodicamente.
+import atexit
+import threading
+from collections import defaultdict
+
+from src.services.hyperloglog import HyperLogLog
+
+
+class ViewIngestor:
+    def __init__(self, sink, precision=12, flush_interval=5.0):
+        # sink recebe {clip_id: novas visualizações únicas}
+        self._sink = sink
+        self._precision = precision
+        self._sketches = {}
+        self._folded = defaultdict(int)
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def ingest(self, clip_id, viewer_id):
+        with self._lock:
+            sketch = self._sketches.get(clip_id)
+            if sketch is None:
+                sketch = self._sketches[clip_id] = HyperLogLog(self._precision)
+            sketch.add(viewer_id)
+            self._dirty.add(clip_id)
+
+    def unique_viewers(self, clip_id):
+        with self._lock:
+            sketch = self._sketches.get(clip_id)
+            return sketch.count() if sketch else 0
+
+    def pending(self, clip_id):
+        # Visualizações únicas ainda não incorporadas ao clipe
+        with self._lock:
+            sketch = self._sketches.get(clip_id)
+            if sketch is None:
+                return 0
+            return max(0, sketch.count() - self._folded[clip_id])
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            deltas = {}
+            for clip_id in dirty:
+                estimate = self._sketches[clip_id].count()
+                delta = estimate - self._folded[clip_id]
+                if delta > 0:
+                    deltas[clip_id] = delta
+                    self._folded[clip_id] = estimate
+
+        if not deltas:
+            return 0
+        try:
+            self._sink(deltas)
+        except Exception:
+            # Desfaz a marcação para tentar novamente no próximo ciclo
+            with self._lock:
+                for clip_id, delta in deltas.items():
+                    self._folded[clip_id] -= delta
+                    self._dirty.add(clip_id)
+            raise
+        return len(deltas)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                continue
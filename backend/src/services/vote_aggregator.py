@@ -0,0 +1,90 @@
+# Agregador de votos compartilhado entre a rota REST e o Socket.IO.
+# Os votos passam pelo mesmo contador (com deduplicação por usuário) e as
+# salas recebem um snapshot das contagens em intervalo fixo, em vez de
+# uma mensagem por voto.
+import threading
+
+
+class VoteAggregator:
+    def __init__(self, counter, stored_votes, interval_ms=500, event='votes_updated'):
+        # stored_votes(loadout_id) devolve o total persistido ou None se não existir
+        self._counter = counter
+        self._stored_votes = stored_votes
+        self._interval = interval_ms / 1000.0
+        self._event = event
+        self._socketio = None
+        # loadout -> salas acompanhando suas contagens (e o inverso, para unwatch)
+        self._watchers = {}
+        self._watched = {}
+        # sala -> loadouts alterados desde o último envio
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+    def bind(self, socketio):
+        self._socketio = socketio
+
+    def tally(self, loadout_id):
+        stored = self._stored_votes(loadout_id)
+        if stored is None:
+            return None
+        return self._counter.value(loadout_id, stored)
+
+    def snapshot(self, loadout_ids):
+        return {loadout_id: self.tally(loadout_id) for loadout_id in loadout_ids}
+
+    def watch(self, room, loadout_id):
+        # Só loadouts existentes são acompanhados; retorna se foi aceito
+        if not isinstance(loadout_id, str) or self._stored_votes(loadout_id) is None:
+            return False
+        with self._lock:
+            self._watchers.setdefault(loadout_id, set()).add(room)
+            self._watched.setdefault(room, set()).add(loadout_id)
+        return True
+
+    def unwatch(self, room):
+        # Sala vazia: para de acompanhar e descarta envios pendentes
+        with self._lock:
+            for loadout_id in self._watched.pop(room, ()):
+                rooms = self._watchers.get(loadout_id)
+                if rooms is not None:
+                    rooms.discard(room)
+                    if not rooms:
+                        del self._watchers[loadout_id]
+            self._dirty.pop(room, None)
+
+    def vote(self, loadout_id, user_id, room=None):
+        # Retorna (aceito, total) ou None se o loadout não existir
+        if self._stored_votes(loadout_id) is None:
+            return None
+        if room is not None:
+            self.watch(room, loadout_id)
+        accepted = self._counter.increment(loadout_id, user_id)
+        if accepted:
+            self._mark(loadout_id)
+        return accepted, self.tally(loadout_id)
+
+    def _mark(self, loadout_id):
+        scheduled = []
+        with self._lock:
+            for room in self._watchers.get(loadout_id, ()):
+                dirty = self._dirty.get(room)
+                if dirty is None:
+                    self._dirty[room] = {loadout_id}
+                    scheduled.append(room)
+                else:
+                    dirty.add(loadout_id)
+
+        if self._socketio is None:
+            return
+        for room in scheduled:
+            self._socketio.start_background_task(self._flush_later, room)
+
+    def _flush_later(self, room):
+        self._socketio.sleep(self._interval)
+        self.flush(room)
+
+    def flush(self, room):
+        with self._lock:
+            loadout_ids = self._dirty.pop(room, None)
+        if loadout_ids and self._socketio is not None:
+            self._socketio.emit(self._event, {'tallies': self.snapshot(loadout_ids)}, room=room)
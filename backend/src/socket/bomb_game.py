@@ -1,7 +1,43 @@
-from flask import Blueprint
-from flask_socketio import emit, join_room, leave_room
+from flask import Blueprint, request
+from flask_login import current_user
+from flask_socketio import emit, join_room, leave_room, rooms
+import os
+
+from src.services.bomb_game_state import BombGameState, generate_sequence
+from src.services.room_batcher import RoomBatcher
+from src.routes.bomb_game import rooms_db
+from src.socket.connection import on_disconnect
+
+# Intervalo de agrupamento das teclas enviadas para a sala (16-50 ms)
+INPUT_TICK_MS = min(50, max(16, int(os.environ.get('BOMB_INPUT_TICK_MS', 33))))
 
 def register_bomb_game_events(socketio):
+    input_batcher = RoomBatcher(socketio, 'inputs_received', INPUT_TICK_MS)
+    # sala -> partida em andamento (estado autoritativo do servidor)
+    games = {}
+    # Libera as vagas ocupadas pela conexão encerrada
+    on_disconnect(socketio, rooms_db.detach_all)
+    
+    def finish_game(room, game):
+        # Garante que as teclas pendentes cheguem antes do resultado
+        input_batcher.flush(room)
+        if games.get(room) is game:
+            del games[room]
+            rooms_db.set_status(room, "Aguardando")
+        socketio.emit('game_result', game.result(), room=room)
+    
+    def joined(room):
+        # Só conexões que entraram na sala agem sobre a partida dela
+        if room is not None and room != request.sid and room in rooms():
+            return True
+        emit('not_in_room', {'room': room}, room=request.sid)
+        return False
+    
+    def expire_game(room, game):
+        socketio.sleep(game.time_limit)
+        if games.get(room) is game and game.check_timeout():
+            finish_game(room, game)
+    
     @socketio.on('connect')
     def handle_connect():
         emit('connection_response', {'status': 'connected'})
@@ -9,20 +45,47 @@ def register_bomb_game_events(socketio):
     @socketio.on('join_bomb_room')
     def handle_join_bomb_room(data):
         room = data.get('room')
+        
+        # Salas registradas controlam a ocupação pela conexão real
+        if room in rooms_db:
+            member = current_user.id if current_user.is_authenticated else request.sid
+            _, error = rooms_db.attach(room, member, request.sid)
+            if error == 'full':
+                emit('room_full', {'room': room})
+                return
+        
         join_room(room)
         emit('room_joined', {'room': room}, room=room)
     
     @socketio.on('leave_bomb_room')
     def handle_leave_bomb_room(data):
         room = data.get('room')
+        rooms_db.detach(room, request.sid)
         leave_room(room)
         emit('room_left', {'room': room}, room=room)
     
     @socketio.on('bomb_game_start')
     def handle_bomb_game_start(data):
         room = data.get('room')
-        sequence = data.get('sequence')
-        time_limit = data.get('time_limit', 60)
+        difficulty = data.get('difficulty', 'medium')
+        if not joined(room):
+            return
+        
+        # Uma partida em andamento não é substituída
+        current = games.get(room)
+        if current is not None:
+            if not current.check_timeout():
+                emit('game_in_progress', {'room': room}, room=request.sid)
+                return
+            finish_game(room, current)
+        
+        # A sequência é sempre gerada no servidor
+        sequence, time_limit = generate_sequence(difficulty)
+        game = BombGameState(sequence, time_limit)
+        games[room] = game
+        input_batcher.discard(room)
+        rooms_db.set_status(room, "Em andamento")
+        socketio.start_background_task(expire_game, room, game)
         
         emit('game_started', {
             'sequence': sequence,
@@ -34,29 +97,43 @@ def register_bomb_game_events(socketio):
         room = data.get('room')
         input_char = data.get('input')
         position = data.get('position')
+        if not joined(room):
+            return
+        
+        game = games.get(room)
+        if game is None or not game.apply_input(input_char, position):
+            emit('input_rejected', {
+                'input': input_char,
+                'position': position
+            }, room=request.sid)
+            if game is not None and game.finished:
+                finish_game(room, game)
+            return
         
-        emit('input_received', {
+        input_batcher.push(room, {
             'input': input_char,
             'position': position
-        }, room=room)
+        })
+        
+        if game.finished:
+            finish_game(room, game)
     
     @socketio.on('bomb_game_result')
     def handle_bomb_game_result(data):
+        # O cliente apenas avisa que o tempo acabou; o resultado é do servidor
         room = data.get('room')
-        success = data.get('success')
-        time_taken = data.get('time_taken')
-        reward = data.get('reward', 0)
-        
-        emit('game_result', {
-            'success': success,
-            'time_taken': time_taken,
-            'reward': reward
-        }, room=room)
+        if not joined(room):
+            return
+        game = games.get(room)
+        if game is not None and game.check_timeout():
+            finish_game(room, game)
     
     @socketio.on('bomb_game_cooperative_hint')
     def handle_bomb_game_cooperative_hint(data):
         room = data.get('room')
         hint = data.get('hint')
+        if not joined(room):
+            return
         
         emit('hint_received', {
             'hint': hint
@@ -0,0 +1,19 @@
+# Limpeza de estado por conexão compartilhada entre os módulos de eventos.
+# O Socket.IO guarda um único handler por evento, então cada módulo registra
+# aqui o que liberar quando a conexão cai, em vez de declarar 'disconnect'.
+from flask import request
+
+# socketio -> funções chamadas com o sid da conexão encerrada
+_disconnect_listeners = {}
+
+
+def on_disconnect(socketio, listener):
+    listeners = _disconnect_listeners.get(socketio)
+    if listeners is None:
+        listeners = _disconnect_listeners[socketio] = []
+
+        @socketio.on('disconnect')
+        def handle_disconnect():
+            for callback in listeners:
+                callback(request.sid)
+    listeners.append(listener)
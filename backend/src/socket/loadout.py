@@ -1,7 +1,28 @@
-from flask import Blueprint
-from flask_socketio import emit, join_room, leave_room
+from flask import Blueprint, request
+from flask_login import current_user
+from flask_socketio import emit, join_room, leave_room, rooms
+
+from src.routes.loadout import loadout_validator, vote_aggregator
+from src.services.loadout_sync import LoadoutSyncHub
+from src.socket.connection import on_disconnect
 
 def register_loadout_events(socketio):
+    vote_aggregator.bind(socketio)
+    # Loadout canônico por sala para a edição colaborativa
+    sync_hub = LoadoutSyncHub(loadout_validator)
+    
+    def release(sid):
+        # Libera loadouts e contagens acompanhadas das salas que ficaram vazias
+        for room in sync_hub.leave_all(sid):
+            vote_aggregator.unwatch(room)
+    
+    on_disconnect(socketio, release)
+    
+    def broadcast_patch(room, patch):
+        if patch['changes']:
+            emit('loadout_patched', dict(patch, room=room), room=room, include_self=False)
+        emit('loadout_patch_ack', {'room': room, 'version': patch['version']})
+    
     @socketio.on('connect')
     def handle_connect():
         emit('connection_response', {'status': 'connected'})
@@ -10,26 +31,72 @@ def register_loadout_events(socketio):
     def handle_join_loadout_room(data):
         room = data.get('room')
         join_room(room)
+        sync_hub.join(room, request.sid)
         emit('room_joined', {'room': room}, room=room)
+        
+        # Quem entra recebe o estado completo; depois, apenas patches
+        emit('loadout_snapshot', dict(sync_hub.snapshot(room), room=room))
+        
+        # Acompanha as contagens dos loadouts exibidos na sala (só ids conhecidos)
+        loadout_ids = data.get('loadout_ids', [])
+        if not isinstance(loadout_ids, list):
+            loadout_ids = []
+        loadout_ids = [loadout_id for loadout_id in loadout_ids
+                       if vote_aggregator.watch(room, loadout_id)]
+        if loadout_ids:
+            emit('votes_updated', {'tallies': vote_aggregator.snapshot(loadout_ids)})
     
     @socketio.on('leave_loadout_room')
     def handle_leave_loadout_room(data):
         room = data.get('room')
         leave_room(room)
+        if sync_hub.leave(room, request.sid):
+            vote_aggregator.unwatch(room)
         emit('room_left', {'room': room}, room=room)
     
     @socketio.on('loadout_update')
     def handle_loadout_update(data):
+        # Loadout completo (clientes antigos): só as diferenças são repassadas
+        room = data.get('room')
+        patch, error = sync_hub.replace(room, data.get('loadout')) if room in rooms() \
+            else (None, 'not_in_room')
+        if error:
+            emit('loadout_patch_rejected', {'room': room, 'reason': error})
+            return
+        broadcast_patch(room, patch)
+    
+    @socketio.on('loadout_patch')
+    def handle_loadout_patch(data):
         room = data.get('room')
-        loadout_data = data.get('loadout')
-        emit('loadout_updated', {'loadout': loadout_data}, room=room)
+        patch, error = sync_hub.apply(room, data.get('version'), data.get('changes')) \
+            if room in rooms() else (None, 'not_in_room')
+        if error == 'version_gap':
+            # Cliente desatualizado: reenvia o estado completo
+            emit('loadout_snapshot', dict(sync_hub.snapshot(room), room=room))
+            return
+        if error:
+            emit('loadout_patch_rejected', {'room': room, 'reason': error})
+            return
+        broadcast_patch(room, patch)
     
     @socketio.on('loadout_vote')
     def handle_loadout_vote(data):
         room = data.get('room')
         loadout_id = data.get('loadout_id')
-        user_id = data.get('user_id')
-        emit('vote_received', {
-            'loadout_id': loadout_id,
-            'user_id': user_id
-        }, room=room)
+        
+        if not current_user.is_authenticated:
+            emit('vote_rejected', {
+                'loadout_id': loadout_id,
+                'message': 'Usuário não autenticado'
+            })
+            return
+        
+        # A contagem vai para a sala no próximo snapshot agregado (só se
+        # esta conexão estiver nela; a sala deixa de ser acompanhada ao esvaziar)
+        result = vote_aggregator.vote(loadout_id, current_user.id,
+                                      room if room in rooms() else None)
+        if result is None or not result[0]:
+            emit('vote_rejected', {
+                'loadout_id': loadout_id,
+                'message': 'Loadout não encontrado' if result is None else 'Você já votou neste loadout'
+            })
@@ -94,15 +94,20 @@ const CoopBombDefusal: React.FC<CoopBombDefusalProps> = ({
       setCurrentPosition(0);
     });
     
-    newSocket.on('input_received', (data) => {
+    newSocket.on('inputs_received', (data: { inputs: { input: string, position: number }[] }) => {
       if (role === 'defuser') {
         return; // O desarmador já vê sua própria entrada
       }
       
+      // As teclas chegam agrupadas por tick do servidor
       const newInput = [...input];
-      newInput[data.position] = data.input;
+      let lastPosition = -1;
+      data.inputs.forEach(({ input: key, position }) => {
+        newInput[position] = key;
+        lastPosition = Math.max(lastPosition, position);
+      });
       setInput(newInput);
-      setCurrentPosition(data.position + 1);
+      setCurrentPosition(lastPosition + 1);
     });
     
     newSocket.on('hint_received', (data) => {
@@ -203,18 +208,7 @@ const CoopBombDefusal: React.FC<CoopBombDefusalProps> = ({
       }
       
       setCurrentPosition(currentPosition + 1);
-      
-      // Verificar se completou a sequência
-      if (currentPosition === settings.length - 1) {
-        // A verificação é feita no servidor
-        if (socket) {
-          socket.emit('bomb_game_verify', {
-            room: roomId,
-            input_sequence: [...newInput, key].join(''),
-            time_taken: settings.time - timeLeft
-          });
-        }
-      }
+      // O servidor valida cada tecla e envia game_result ao completar a sequência
     }
   };
 